@@ -0,0 +1,231 @@
+import fcntl
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAGIC = b"DICTSPL1"
+SPOOL_HEADER_BYTES = 64
+SPOOL_SUFFIX = ".pcm"
+
+
+def _open_private(path: Path, flags: int) -> int:
+    """Create or truncate `path` with mode 0600 and return its descriptor"""
+    fd = os.open(path, flags | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # an existing file keeps its mode otherwise
+    return fd
+
+
+class AudioSpool:
+    """Memory-mapped int16 PCM file that outlives a crash of the recorder.
+
+    Layout: a 64 byte header (magic, sample rate, channels, frame count)
+    followed by raw samples. The frame count is updated in the mapping after
+    every write, so the file is recoverable if the process dies; the OS writes
+    dirty pages back even then. The process using a spool holds an flock on
+    it, which the OS releases when the process dies, so other instances
+    leave spools that are still in use alone.
+    """
+    def __init__(self, path: Path, mapping: np.memmap, lock_file=None):
+        self.path = path
+        self.mapping = mapping
+        self.lock_file = lock_file
+        self._header = mapping[:SPOOL_HEADER_BYTES]
+        self._frames = self._header[16:24].view(np.uint64)
+        self.sample_rate = int(self._header[8:12].view(np.uint32)[0])
+        self.data = mapping[SPOOL_HEADER_BYTES:].view(np.int16)
+
+    @classmethod
+    def create(cls, path: Path, capacity_frames: int, sample_rate: int) -> "AudioSpool":
+        # Raw recordings are private: owner-only directory and files
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        lock_file = open(_open_private(path, os.O_RDWR), 'wb')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Sparse file: blocks are only allocated as samples are written
+            lock_file.truncate(SPOOL_HEADER_BYTES + capacity_frames * 2)
+            mapping = np.memmap(path, dtype=np.uint8, mode='r+')
+        except BaseException:
+            lock_file.close()
+            raise
+        mapping[:8] = np.frombuffer(SPOOL_MAGIC, dtype=np.uint8)
+        mapping[8:12].view(np.uint32)[0] = sample_rate
+        mapping[12:16].view(np.uint32)[0] = 1
+        mapping[16:24].view(np.uint64)[0] = 0
+        return cls(path, mapping, lock_file)
+
+    @classmethod
+    def open(cls, path: Path) -> Optional["AudioSpool"]:
+        """Open and lock an existing spool file, or None if it is not one or is in use"""
+        try:
+            lock_file = open(path, 'rb')
+        except OSError as e:
+            logger.warning(f"Cannot open spool file {path}: {e}")
+            return None
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            logger.debug(f"Skipping {path}: in use by another process")
+            return None
+        try:
+            mapping = np.memmap(path, dtype=np.uint8, mode='r')
+        except (OSError, ValueError) as e:
+            lock_file.close()
+            logger.warning(f"Cannot open spool file {path}: {e}")
+            return None
+        if len(mapping) < SPOOL_HEADER_BYTES or bytes(mapping[:8]) != SPOOL_MAGIC:
+            lock_file.close()
+            logger.warning(f"Ignoring {path}: not a spool file")
+            return None
+        return cls(path, mapping, lock_file)
+
+    @property
+    def frames(self) -> int:
+        return int(self._frames[0])
+
+    def set_frames(self, frames: int):
+        self._frames[0] = frames
+
+    def view(self) -> np.ndarray:
+        """Mmap-backed view of the recorded samples"""
+        return self.data[:self.frames]
+
+    def save_transcript(self, text: str) -> Path:
+        """Write the recovered text next to the spool, readable by this user only"""
+        path = self.path.with_suffix(".txt")
+        with open(_open_private(path, os.O_WRONLY), 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def discard(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+
+def find_spools(spool_dir: Path) -> List[AudioSpool]:
+    """Spool files left behind by a recorder that did not finish, locked for the caller"""
+    if not spool_dir.is_dir():
+        return []
+    spools = []
+    for path in sorted(spool_dir.glob(f"*{SPOOL_SUFFIX}")):
+        spool = AudioSpool.open(path)
+        if spool is not None:
+            spools.append(spool)
+    return spools
+
+
+class AudioArena:
+    """Preallocated int16 capture buffer filled by the audio callback.
+
+    The whole capacity is reserved up front with np.empty, so the OS only
+    commits pages as they are written and the callback never allocates.
+    There is a single writer (the PortAudio thread); it copies a block in and
+    then publishes the new length through `frames`, so readers can take views
+    of everything up to `frames` without locking.
+
+    A spool can be attached while recording (see `attach_spool`). Once one
+    is attached, only the first `spill_after_frames` are kept in RAM: when a
+    write would pass that, the samples so far are copied into the spool once
+    and capture continues directly in the memory-mapped file. Without one,
+    capture stays in RAM up to the capacity.
+    """
+    def __init__(self, capacity_frames: int, spool: Optional[AudioSpool] = None,
+                 spill_after_frames: Optional[int] = None):
+        self.spool = spool
+        self.spilled = False
+        self.spill_after = capacity_frames if spill_after_frames is None else spill_after_frames
+        self.buffer = np.empty(capacity_frames, dtype=np.int16)
+        self.frames = 0
+        self.dropped = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.buffer)
+
+    def write(self, block: np.ndarray):
+        """Append an int16 block of shape (frames,) or (frames, channels)"""
+        if block.ndim > 1:
+            block = block[:, 0]
+        start = self.frames
+        if start + len(block) > self.spill_after and self.spool is not None and not self.spilled:
+            self._spill()
+        end = min(start + len(block), self.capacity)
+        if end - start < len(block):
+            self.dropped += len(block) - (end - start)
+        self.buffer[start:end] = block[:end - start]
+        self.frames = end
+        if self.spilled:
+            self.spool.set_frames(end)
+
+    def attach_spool(self, spool: AudioSpool):
+        """Hand over a spool created off the audio thread; one reference assignment"""
+        self.spool = spool
+
+    def _spill(self):
+        self.spool.data[:self.frames] = self.buffer[:self.frames]
+        self.spool.set_frames(self.frames)
+        self.buffer = self.spool.data
+        self.spilled = True  # logged by the recorder, not on the audio thread
+
+    def view(self, start: int = 0, end: int = None) -> np.ndarray:
+        """Zero-copy view of the captured samples"""
+        if end is None:
+            end = self.frames
+        return self.buffer[start:end]
+
+    def discard(self):
+        """Remove the spool file once its audio has been transcribed"""
+        if self.spool is not None:
+            self.spool.discard()
+
+
+class PrerollBuffer:
+    """Fixed-size ring holding the most recent audio while not recording.
+
+    Filled by the audio callback of an always-open stream, so the moment
+    before the hotkey (usually the start of the first word) is not lost.
+    """
+    def __init__(self, capacity_frames: int):
+        self.buffer = np.zeros(max(capacity_frames, 1), dtype=np.int16)
+        self.position = 0
+        self.filled = 0
+
+    def write(self, block: np.ndarray):
+        if block.ndim > 1:
+            block = block[:, 0]
+        capacity = len(self.buffer)
+        if len(block) >= capacity:
+            self.buffer[:] = block[-capacity:]
+            self.position = 0
+            self.filled = capacity
+            return
+        end = self.position + len(block)
+        if end <= capacity:
+            self.buffer[self.position:end] = block
+        else:
+            split = capacity - self.position
+            self.buffer[self.position:] = block[:split]
+            self.buffer[:end - capacity] = block[split:]
+        self.position = end % capacity
+        self.filled = min(self.filled + len(block), capacity)
+
+    def latest(self) -> np.ndarray:
+        """Copy of the buffered audio, oldest sample first"""
+        if self.filled < len(self.buffer):
+            return self.buffer[self.position - self.filled:self.position].copy()
+        return np.concatenate((self.buffer[self.position:], self.buffer[:self.position]))
+
+    def clear(self):
+        self.position = 0
+        self.filled = 0
@@ -0,0 +1,202 @@
+import io
+import logging
+import wave
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from audio_device import PolyphaseResampler
+
+
+logger = logging.getLogger(__name__)
+
+# The only sample rates libsndfile's Opus encoder accepts
+OPUS_SAMPLE_RATES = (48000, 24000, 16000, 12000, 8000)
+
+
+def to_int16(audio: np.ndarray) -> np.ndarray:
+    """Return mono int16 PCM, converting from float32 in [-1, 1] if needed"""
+    if audio.ndim > 1:
+        audio = audio.reshape(len(audio), -1)[:, 0]
+    if audio.dtype == np.int16:
+        return audio
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class AudioEncoder:
+    """Encodes mono PCM into an in-memory audio file"""
+    name = ""
+    extension = ""
+
+    def is_available(self) -> bool:
+        return True
+
+    def encode(self, audio: np.ndarray, sample_rate: int) -> bytes:
+        raise NotImplementedError
+
+
+class WavEncoder(AudioEncoder):
+    name = "wav"
+    extension = "wav"
+
+    def encode(self, audio: np.ndarray, sample_rate: int) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(to_int16(audio).tobytes())
+        return buffer.getvalue()
+
+
+class SoundFileEncoder(AudioEncoder):
+    """Encoder backed by libsndfile through the optional soundfile package"""
+    format = ""
+    subtype = ""
+
+    def __init__(self, compression_level: Optional[float] = None):
+        self.compression_level = compression_level
+
+    def is_available(self) -> bool:
+        try:
+            import soundfile
+        except (ImportError, OSError):
+            return False
+        return self.subtype in soundfile.available_subtypes(self.format)
+
+    def encode(self, audio: np.ndarray, sample_rate: int) -> bytes:
+        import soundfile
+
+        kwargs = {}
+        if self.compression_level is not None:
+            kwargs["compression_level"] = self.compression_level
+
+        buffer = io.BytesIO()
+        soundfile.write(buffer, to_int16(audio), sample_rate,
+                        format=self.format, subtype=self.subtype, **kwargs)
+        return buffer.getvalue()
+
+
+class FlacEncoder(SoundFileEncoder):
+    name = "flac"
+    extension = "flac"
+    format = "FLAC"
+    subtype = "PCM_16"
+
+
+class OpusEncoder(SoundFileEncoder):
+    name = "opus"
+    extension = "ogg"
+    format = "OGG"
+    subtype = "OPUS"
+
+    def __init__(self, bitrate: Optional[int] = None):
+        # libsndfile maps compression level 0..1 linearly onto 256..6 kbit/s
+        level = None if bitrate is None else min(1.0, max(0.0, (256000 - bitrate) / 250000))
+        super().__init__(level)
+        self.bitrate = bitrate
+
+    def encode(self, audio: np.ndarray, sample_rate: int) -> bytes:
+        # Other rates (e.g. 44.1 kHz) go to the highest supported one below them
+        rate = next((rate for rate in OPUS_SAMPLE_RATES if rate <= sample_rate), OPUS_SAMPLE_RATES[-1])
+        if rate != sample_rate:
+            audio = PolyphaseResampler(sample_rate, rate).resample(to_int16(audio))
+        return super().encode(audio, rate)
+
+
+ENCODERS: Dict[str, AudioEncoder] = {}
+
+
+def register_encoder(encoder: AudioEncoder):
+    """Make an encoder selectable by name through Config.audio_format"""
+    ENCODERS[encoder.name] = encoder
+
+
+for _encoder in (WavEncoder(), FlacEncoder(), OpusEncoder()):
+    register_encoder(_encoder)
+
+
+def get_encoder(name: str) -> AudioEncoder:
+    """Look up an encoder by name, falling back to WAV if it is unusable"""
+    encoder = ENCODERS.get(name)
+    if encoder is None:
+        logger.warning(f"Unknown audio format '{name}', using WAV")
+        return ENCODERS["wav"]
+    if not encoder.is_available():
+        logger.warning(f"{name} encoder not available (install soundfile), using WAV")
+        return ENCODERS["wav"]
+    return encoder
+
+
+def encode_audio(audio: np.ndarray, sample_rate: int, audio_format: str = "flac") -> Tuple[str, bytes]:
+    """Encode audio in memory, returning a (filename, data) upload tuple"""
+    encoder = get_encoder(audio_format)
+    data = encoder.encode(audio, sample_rate)
+    return f"audio.{encoder.extension}", data
+
+
+def read_audio_file(path) -> Tuple[np.ndarray, int]:
+    """Load an audio file as mono int16 PCM: WAV natively, anything else libsndfile reads via soundfile"""
+    try:
+        with wave.open(str(path), 'rb') as wav_file:
+            if wav_file.getsampwidth() == 2:
+                frames = wav_file.readframes(wav_file.getnframes())
+                audio = np.frombuffer(frames, dtype=np.int16).reshape(-1, wav_file.getnchannels())
+                return to_int16(audio), wav_file.getframerate()
+    except (wave.Error, EOFError):
+        pass
+
+    try:
+        import soundfile
+    except (ImportError, OSError) as e:
+        raise ValueError(f"Cannot read {path}: only 16-bit WAV is supported without soundfile") from e
+    audio, sample_rate = soundfile.read(str(path), dtype='int16', always_2d=True)
+    return to_int16(audio), sample_rate
+
+
+def _downmix(block: np.ndarray) -> np.ndarray:
+    """Average the channels of an int16 (frames, channels) block"""
+    if block.shape[1] == 1:
+        return block[:, 0]
+    return np.rint(block.mean(axis=1, dtype=np.float32)).astype(np.int16)
+
+
+def read_audio_blocks(path, block_frames: int = 1 << 16) -> Tuple[int, int, Iterator[np.ndarray]]:
+    """Open an audio file for streaming: (sample rate, frame count, mono int16 blocks).
+
+    Only one block is decoded at a time, so memory does not grow with the
+    file's length or channel count. The frame count is -1 if unknown.
+    """
+    try:
+        wav_file = wave.open(str(path), 'rb')
+    except (wave.Error, EOFError):
+        wav_file = None
+    if wav_file is not None and wav_file.getsampwidth() != 2:
+        wav_file.close()
+        wav_file = None
+    if wav_file is not None:
+        channels = wav_file.getnchannels()
+
+        def wav_blocks():
+            with wav_file:
+                while True:
+                    frames = wav_file.readframes(block_frames)
+                    if not frames:
+                        return
+                    yield _downmix(np.frombuffer(frames, dtype=np.int16).reshape(-1, channels))
+
+        return wav_file.getframerate(), wav_file.getnframes(), wav_blocks()
+
+    try:
+        import soundfile
+    except (ImportError, OSError) as e:
+        raise ValueError(f"Cannot read {path}: only 16-bit WAV is supported without soundfile") from e
+    sound_file = soundfile.SoundFile(str(path))
+
+    def sound_file_blocks():
+        with sound_file:
+            for block in sound_file.blocks(block_frames, dtype='int16', always_2d=True):
+                yield _downmix(block)
+
+    return sound_file.samplerate, sound_file.frames, sound_file_blocks()
+
@@ -0,0 +1,126 @@
+import logging
+from math import gcd
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_input_device(sd, device: Union[int, str, None]) -> Tuple[Optional[int], str, int]:
+    """Find the configured input device: (index or None, name, native rate).
+
+    `device` is a PortAudio index, a case-insensitive substring of the device
+    name, or None for the system default. An unknown device falls back to the
+    default with a warning rather than failing the recording.
+    """
+    if isinstance(device, str):
+        for index, info in enumerate(sd.query_devices()):
+            if info["max_input_channels"] > 0 and device.lower() in info["name"].lower():
+                return index, info["name"], int(info["default_samplerate"])
+        logger.warning(f"No input device matching '{device}', using the default")
+        device = None
+    try:
+        info = sd.query_devices(device, "input")
+    except (ValueError, sd.PortAudioError) as e:
+        if device is None:
+            raise
+        logger.warning(f"Input device {device} unavailable ({e}), using the default")
+        device = None
+        info = sd.query_devices(None, "input")
+    return device, info["name"], int(info["default_samplerate"])
+
+
+class PolyphaseResampler:
+    """Streaming rational-ratio resampler for int16 audio.
+
+    Converts by up/down = target/source with a Kaiser-windowed sinc low-pass,
+    evaluated as a polyphase filter bank: each output sample is one dot
+    product of `taps` inputs with the phase it falls on, and a whole block is
+    computed in a single vectorized gather and multiply. The last inputs are
+    carried over between blocks, so a stream can be fed block by block from
+    the audio callback and come out seamless.
+    """
+    def __init__(self, source_rate: int, target_rate: int, zero_crossings: int = 12,
+                 rolloff: float = 0.92, beta: float = 8.0):
+        divisor = gcd(source_rate, target_rate)
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.up = target_rate // divisor
+        self.down = source_rate // divisor
+
+        # Prototype low-pass at the upsampled rate, cut below the lower Nyquist
+        factor = max(self.up, self.down)
+        cutoff = rolloff / factor
+        half = zero_crossings * factor
+        n = np.arange(-half, half + 1)
+        prototype = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), beta) * self.up
+
+        # Phase p holds prototype[p + k * up]; reversed so a window of input
+        # samples in time order can be multiplied directly
+        self.taps = -(-len(prototype) // self.up)
+        padded = np.zeros(self.taps * self.up)
+        padded[:len(prototype)] = prototype
+        self.phases = np.ascontiguousarray(
+            padded.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32)
+
+        self.history = np.zeros(self.taps - 1, dtype=np.float32)
+        self.time = 0  # next output position in upsampled samples, relative to the block start
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Resample the next block of a stream; returns int16 samples"""
+        if block.ndim > 1:
+            block = block[:, 0]
+        if self.up == self.down:
+            return block
+        samples = np.concatenate((self.history, block.astype(np.float32)))
+        span = len(block) * self.up
+        count = max(0, -(-(span - self.time) // self.down))
+
+        positions = self.time + self.down * np.arange(count)
+        newest = positions // self.up + self.taps - 1  # index into `samples`
+        windows = samples[newest[:, None] + np.arange(1 - self.taps, 1)]
+        out = np.einsum('nk,nk->n', windows, self.phases[positions % self.up])
+
+        self.time += count * self.down - span
+        self.history = samples[len(samples) - (self.taps - 1):]
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+    def resample(self, audio: np.ndarray, batch: int = 1 << 16) -> np.ndarray:
+        """Resample a whole recording in one pass, in bounded-memory batches"""
+        return np.concatenate([self.process(audio[start:start + batch])
+                               for start in range(0, len(audio), batch)] or [audio[:0]])
+
+
+class CallbackStats:
+    """What the audio callback saw: PortAudio status flags and callbacks that ran late.
+
+    Updated from the PortAudio thread without a lock; a reader may see one
+    callback's worth of staleness, which is fine for diagnostics.
+    """
+    def __init__(self):
+        self.callbacks = 0
+        self.input_overflows = 0  # audio PortAudio had to drop because we were too slow
+        self.input_underflows = 0
+        self.late = 0  # callbacks that took longer than the audio they carried
+        self.slowest = 0.0
+
+    def record(self, status, frames: int, sample_rate: int, elapsed: float):
+        self.callbacks += 1
+        if status:
+            self.input_overflows += bool(getattr(status, "input_overflow", False))
+            self.input_underflows += bool(getattr(status, "input_underflow", False))
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+        if frames and elapsed > frames / sample_rate:
+            self.late += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "callbacks": self.callbacks,
+            "input_overflows": self.input_overflows,
+            "input_underflows": self.input_underflows,
+            "late": self.late,
+            "slowest_ms": round(self.slowest * 1000, 3),
+        }
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Transcribe a folder of recordings into a JSONL file, resumably
+
+    python3 batch.py ~/VoiceNotes -o notes.jsonl --concurrency 4
+
+Files are decoded ahead of the uploads on a small thread pool, transcribed
+with bounded concurrency using the same Config and transcriber as the app,
+and each result is appended to the output as soon as it is ready. The
+output doubles as the resume manifest: running the same command again skips
+every file already transcribed, unless it changed since.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from audio_codec import read_audio_blocks
+from audio_device import PolyphaseResampler
+from config import Config
+from transcribers import Transcriber, create_transcriber
+
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".opus", ".mp3", ".aiff", ".aif")
+
+
+def find_audio_files(root: Path, extensions=AUDIO_EXTENSIONS) -> List[Path]:
+    return sorted(path for path in root.rglob("*")
+                  if path.is_file() and path.suffix.lower() in extensions)
+
+
+def load_manifest(output: Path) -> Dict[str, dict]:
+    """Successful results of earlier runs, keyed by relative path"""
+    done = {}
+    if not output.exists():
+        return done
+    with open(output, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done[record["path"]] = record
+    return done
+
+
+def rate_limit_delay(error: BaseException) -> Optional[float]:
+    """For an HTTP 429 (here or in the cause chain): its retry-after in seconds,
+    0.0 when it has none. None for any other error."""
+    while error is not None:
+        if getattr(error, "status_code", None) == 429:
+            try:
+                return float(error.response.headers.get("retry-after", 0))
+            except (AttributeError, TypeError, ValueError):
+                return 0.0
+        error = error.__cause__
+    return None
+
+
+class BatchRunner:
+    """Decode, transcribe and record a list of files with bounded concurrency"""
+    def __init__(self, config: Config, transcriber: Transcriber, root: Path, output: Path,
+                 concurrency: int = 4, retries: int = 4):
+        self.config = config
+        self.transcriber = transcriber
+        self.root = root
+        self.output = output
+        self.concurrency = concurrency
+        self.retries = retries
+        self.sample_rate = int(config.sample_rate)
+        self.resume_at = 0.0  # every worker holds off until then after a 429
+        self.completed = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+
+    def _key(self, path: Path) -> str:
+        return str(path.relative_to(self.root))
+
+    def pending(self, files: List[Path]) -> List[Path]:
+        done = load_manifest(self.output)
+        pending = []
+        for path in files:
+            record = done.get(self._key(path))
+            stat = path.stat()
+            if record and record.get("size") == stat.st_size and record.get("mtime") == stat.st_mtime:
+                continue
+            pending.append(path)
+        return pending
+
+    def _decode(self, path: Path) -> np.ndarray:
+        """Mono int16 at the configured rate, downmixed and resampled block by block"""
+        sample_rate, frames, blocks = read_audio_blocks(path)
+        resampler = None
+        if sample_rate != self.sample_rate:
+            resampler = PolyphaseResampler(sample_rate, self.sample_rate)
+            frames = -(-frames * resampler.up // resampler.down)
+        audio = np.empty(max(frames, 1 << 16), dtype=np.int16)
+        filled = 0
+        for block in blocks:
+            if resampler is not None:
+                block = resampler.process(block)
+            if filled + len(block) > len(audio):
+                # The frame count was unknown or an estimate
+                grown = np.empty(max(2 * len(audio), filled + len(block)), dtype=np.int16)
+                grown[:filled] = audio[:filled]
+                audio = grown
+            audio[filled:filled + len(block)] = block
+            filled += len(block)
+        return audio[:filled]
+
+    async def run(self, files: List[Path]):
+        total = len(files)
+        # Decoded files wait here for an upload slot; the bound keeps memory flat
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        decode_slots = asyncio.Semaphore(2)
+        started = time.perf_counter()
+
+        async def decode(path: Path):
+            async with decode_slots:
+                try:
+                    audio = await asyncio.to_thread(self._decode, path)
+                except Exception as e:
+                    self._write(path, status="error", error=f"Cannot decode: {e}")
+                    return
+            await queue.put((path, audio))
+
+        async def produce():
+            # Only a few decodes run ahead of the uploads
+            tasks = set()
+            for path in files:
+                task = asyncio.ensure_future(decode(path))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                while len(tasks) >= 2:
+                    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            await asyncio.gather(*tasks)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                path, audio = item
+                await self._transcribe(path, audio)
+                done = self.completed + self.failed
+                logger.info(f"[{done}/{total}] {self._key(path)}")
+
+        await asyncio.gather(produce(), *(consume() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - started
+        logger.info(f"Transcribed {self.completed} files ({self.audio_seconds / 60:.1f} min of audio) "
+                    f"in {elapsed:.1f}s, {self.failed} failed; "
+                    f"{self.audio_seconds / max(elapsed, 1e-9):.1f}x real time")
+
+    async def _transcribe(self, path: Path, audio):
+        loop = asyncio.get_running_loop()
+        seconds = len(audio) / self.sample_rate
+        for attempt in range(self.retries + 1):
+            await asyncio.sleep(max(0.0, self.resume_at - loop.time()))
+            start = time.perf_counter()
+            try:
+                text = await self.transcriber.transcribe(audio, self.sample_rate)
+            except Exception as e:
+                if attempt == self.retries:
+                    self._write(path, status="error", error=str(e), seconds=seconds)
+                    return
+                delay = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                server_delay = rate_limit_delay(e)
+                if server_delay is not None:
+                    # Pause every worker, not just this one
+                    delay = server_delay or delay
+                    self.resume_at = max(self.resume_at, loop.time() + delay)
+                    logger.warning(f"Rate limited, pausing uploads for {delay:.1f}s")
+                else:
+                    logger.warning(f"{self._key(path)} failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                continue
+            self._write(path, status="ok", text=text, seconds=seconds,
+                        elapsed=round(time.perf_counter() - start, 3))
+            return
+
+    def _write(self, path: Path, **fields):
+        stat = path.stat()
+        record = {"path": self._key(path), "size": stat.st_size, "mtime": stat.st_mtime, **fields}
+        if fields.get("status") == "ok":
+            self.completed += 1
+            self.audio_seconds += fields.get("seconds", 0.0)
+        else:
+            self.failed += 1
+            logger.error(f"{record['path']}: {fields.get('error')}")
+        # Appended and synced per file, so an interrupted run loses at most one line
+        with open(self.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def main_async(args):
+    config = Config()
+    if not config.is_configured():
+        raise SystemExit("Groq API key not configured. Set GROQ_API_KEY or use a local model.")
+    # Hedged duplicates would spend rate limit on throughput work
+    config.hedge_requests = config.hedge_same_backend = args.hedge
+
+    root = Path(args.directory).expanduser().resolve()
+    output = Path(args.output).expanduser()
+    transcriber = create_transcriber(config)
+    runner = BatchRunner(config, transcriber, root, output, args.concurrency, args.retries)
+
+    files = find_audio_files(root)
+    pending = runner.pending(files)
+    logger.info(f"{len(files)} audio files, {len(files) - len(pending)} already done")
+    try:
+        await transcriber.warm_up()
+        await runner.run(pending)
+    finally:
+        await transcriber.close()
+    return 1 if runner.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="folder to transcribe, searched recursively")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl",
+                        help="JSONL results, also used to resume (default: transcripts.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="files transcribed at once")
+    parser.add_argument("--retries", type=int, default=4, help="attempts per file after the first")
+    parser.add_argument("--hedge", action="store_true", help="allow hedged duplicate requests")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        sys.exit(asyncio.run(main_async(args)))
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Benchmark parallel chunked transcription against the local mock server
+
+    python3 benchmarks/bench_chunking.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_server import MockGroqServer
+from benchmarks.synth import TONE_GAP_SECONDS, TONE_VOCABULARY, TONE_WORD_SECONDS, tone_words
+from config import Config
+from transcribers import GroqTranscriber
+
+SAMPLE_RATE = 16000
+
+
+def make_transcriber(url: str, chunked: bool) -> GroqTranscriber:
+    config = Config()
+    config.groq_api_key = "mock"
+    config.api_base_url = url
+    config.audio_format = "wav"
+    config.rate_limiter = False  # the mock server has no rate limits
+    config.chunk_threshold_seconds = 60 if chunked else 10 ** 9
+    return GroqTranscriber(config)
+
+
+async def run_once(transcriber: GroqTranscriber, audio: np.ndarray):
+    start = time.perf_counter()
+    text = await transcriber.transcribe(audio, SAMPLE_RATE)
+    return text, time.perf_counter() - start
+
+
+async def main():
+    server = MockGroqServer(latency=0.3, latency_per_audio_second=0.03).start()
+    rng = np.random.default_rng(0)
+    word_seconds = TONE_WORD_SECONDS + TONE_GAP_SECONDS
+
+    print(f"{'audio (s)':>9} {'single (s)':>11} {'chunked (s)':>12} {'speedup':>8} {'words ok':>9}")
+    for seconds in (30, 60, 120, 300, 600):
+        word_ids = rng.integers(0, TONE_VOCABULARY, int(seconds / word_seconds))
+        audio = (tone_words(word_ids, SAMPLE_RATE) * 32767).astype(np.int16)
+        expected = " ".join(f"w{word}" for word in word_ids)
+
+        results = {}
+        for chunked in (False, True):
+            transcriber = make_transcriber(server.url, chunked)
+            results[chunked] = await run_once(transcriber, audio)
+            await transcriber.close()
+
+        (_, single), (text, chunked_time) = results[False], results[True]
+        print(f"{seconds:>9} {single:>11.2f} {chunked_time:>12.2f} "
+              f"{single / chunked_time:>7.1f}x {str(text == expected):>9}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""End-to-end benchmark: fake microphone -> AudioRecorder -> GroqTranscriber -> mock server
+
+Runs headless with no network. Synthetic tone-word audio is replayed through
+a fake sounddevice stream into AudioRecorder, then transcribed against the
+local mock server. For each clip length and audio format it reports encode
+time, bytes on the wire, stop-to-text latency, peak traced memory and
+whether the transcript came back intact.
+
+Peak memory covers only the client: the mock server runs in its own
+process, and the capture buffer is sized to the clip as max_recording_seconds
+would be for recordings of that length.
+
+    python3 benchmarks/bench_e2e.py
+    python3 benchmarks/bench_e2e.py --seconds 10 60 --formats wav flac --bandwidth 250000
+    python3 benchmarks/bench_e2e.py --json results.json   # machine-readable, for comparing runs
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import fakes
+
+fakes.install(fake_audio=True)
+
+import sounddevice as sd  # noqa: E402  (the fake registered above)
+
+from benchmarks.synth import TONE_GAP_SECONDS, TONE_VOCABULARY, TONE_WORD_SECONDS, tone_words  # noqa: E402
+from config import Config  # noqa: E402
+from dictation import AudioRecorder  # noqa: E402
+from metrics import METRICS  # noqa: E402
+from transcribers import GroqTranscriber  # noqa: E402
+
+SAMPLE_RATE = 16000
+MOCK_SERVER = Path(__file__).resolve().parent / "mock_server.py"
+
+
+class ServerProcess:
+    """The mock server in a child process, so its decoding is not traced with the client"""
+    def __init__(self, latency: float, per_audio_second: float, bandwidth: float = None):
+        command = [sys.executable, str(MOCK_SERVER), "--port", "0", "--latency", str(latency),
+                   "--per-audio-second", str(per_audio_second)]
+        if bandwidth:
+            command += ["--bandwidth", str(bandwidth)]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        # "Mock server listening on <url>"
+        self.url = self.process.stdout.readline().split()[-1]
+
+    @property
+    def bytes_received(self) -> int:
+        with urllib.request.urlopen(f"{self.url}/stats") as response:
+            return json.load(response)["bytes_received"]
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def make_config(url: str, audio_format: str, seconds: float) -> Config:
+    config = Config()
+    config.groq_api_key = "mock"
+    config.api_base_url = url
+    config.audio_format = audio_format
+    config.rate_limiter = False  # the mock server has no rate limits
+    config.spool_after_seconds = None  # keep the benchmark out of ~/.dictation_spool
+    # Otherwise the 30 minute default buffer dominates the peak of short clips
+    config.max_recording_seconds = seconds + 1
+    return config
+
+
+def make_clip(seconds: float, seed: int = 0):
+    word_ids = np.random.default_rng(seed).integers(
+        0, TONE_VOCABULARY, max(1, int(seconds / (TONE_WORD_SECONDS + TONE_GAP_SECONDS))))
+    audio = (tone_words(word_ids, SAMPLE_RATE) * 32767).astype(np.int16)
+    return audio, " ".join(f"w{word}" for word in word_ids)
+
+
+async def run_once(server: ServerProcess, audio_format: str, audio: np.ndarray, expected: str) -> dict:
+    config = make_config(server.url, audio_format, len(audio) / SAMPLE_RATE)
+    recorder = AudioRecorder(config)
+    transcriber = GroqTranscriber(config)
+    await transcriber.warm_up()
+    METRICS.reset()
+    bytes_before = server.bytes_received
+
+    tracemalloc.start()
+    sd.source = audio
+    recorder.start_recording()
+    recorder.stream.finished.wait()
+
+    start = time.perf_counter()
+    captured = recorder.stop_recording()
+    text = await transcriber.transcribe(captured, recorder.sample_rate)
+    latency = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await transcriber.close()
+    encode = METRICS.snapshot().get("encode", {"count": 0, "mean": 0.0})
+    return {
+        "seconds": round(len(audio) / SAMPLE_RATE, 1),
+        "format": audio_format,
+        "encode_ms": encode["mean"] * encode["count"] * 1000,
+        "wire_bytes": server.bytes_received - bytes_before,
+        "latency_s": latency,
+        "peak_mib": peak / 2 ** 20,
+        "correct": text == expected,
+    }
+
+
+async def main(args):
+    server = ServerProcess(args.latency, args.per_audio_second, args.bandwidth)
+    results = []
+    print(f"{'audio (s)':>9} {'format':>6} {'encode (ms)':>12} {'wire (KiB)':>11} "
+          f"{'latency (s)':>12} {'peak (MiB)':>11} {'ok':>5}")
+    try:
+        for seconds in args.seconds:
+            audio, expected = make_clip(seconds)
+            for audio_format in args.formats:
+                result = await run_once(server, audio_format, audio, expected)
+                results.append(result)
+                print(f"{result['seconds']:>9.0f} {audio_format:>6} {result['encode_ms']:>12.1f} "
+                      f"{result['wire_bytes'] / 1024:>11.0f} {result['latency_s']:>12.2f} "
+                      f"{result['peak_mib']:>11.1f} {str(result['correct']):>5}")
+    finally:
+        server.stop()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5, 30, 120, 300],
+                        help="clip lengths to test")
+    parser.add_argument("--formats", nargs="+", default=["wav", "flac"],
+                        help="audio formats to test (wav, flac, opus)")
+    parser.add_argument("--latency", type=float, default=0.2, help="mock server seconds per request")
+    parser.add_argument("--per-audio-second", type=float, default=0.02,
+                        help="mock server extra seconds per second of audio")
+    parser.add_argument("--bandwidth", type=float, default=None,
+                        help="mock server upload bytes per second (default unlimited)")
+    parser.add_argument("--json", help="also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
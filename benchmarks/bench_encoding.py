@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark fixed upload formats against the adaptive encoding policy
+
+Sends the same series of dictations (4 to 16 seconds long) through a
+GroqTranscriber to mock servers with different upload bandwidths, from
+tethering to a local network. Reports the mean and p95 time from the end of
+the recording to the transcript, and the encodings auto settled on.
+
+    python3 benchmarks/bench_encoding.py
+"""
+import asyncio
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_server import MockGroqServer
+from benchmarks.synth import TONE_GAP_SECONDS, TONE_VOCABULARY, TONE_WORD_SECONDS, tone_words
+from config import Config
+from transcribers import GroqTranscriber
+
+SAMPLE_RATE = 16000
+DICTATIONS = 16
+BANDWIDTHS = [("64 kB/s", 64_000), ("256 kB/s", 256_000), ("4 MB/s", 4_000_000), ("unlimited", None)]
+FORMATS = ["wav", "flac", "opus", "auto"]
+
+
+def make_clips():
+    rng = np.random.default_rng(0)
+    clips = []
+    for seconds in rng.uniform(4, 16, DICTATIONS):
+        words = rng.integers(0, TONE_VOCABULARY, int(seconds / (TONE_WORD_SECONDS + TONE_GAP_SECONDS)))
+        clips.append(((tone_words(words, SAMPLE_RATE) * 32767).astype(np.int16),
+                      " ".join(f"w{word}" for word in words)))
+    return clips
+
+
+def make_transcriber(url: str, audio_format: str) -> GroqTranscriber:
+    config = Config()
+    config.groq_api_key = "mock"
+    config.api_base_url = url
+    config.audio_format = audio_format
+    config.rate_limiter = False  # the mock server has no rate limits
+    return GroqTranscriber(config)
+
+
+async def run(url: str, audio_format: str, clips):
+    transcriber = make_transcriber(url, audio_format)
+    await transcriber.warm_up()
+    latencies, correct, chosen = [], 0, Counter()
+    for audio, expected in clips:
+        if transcriber.policy is not None:
+            # Peek at what the policy is about to pick
+            chosen[transcriber.policy.choose(len(audio) / SAMPLE_RATE).name] += 1
+            transcriber.policy.uploads -= 1
+        start = time.perf_counter()
+        text = await transcriber.transcribe(audio, SAMPLE_RATE)
+        latencies.append(time.perf_counter() - start)
+        correct += text == expected
+    await transcriber.close()
+    return np.array(latencies), correct, chosen
+
+
+async def main():
+    clips = make_clips()
+    print(f"{'bandwidth':<10} {'format':<6} {'mean (s)':>9} {'p95 (s)':>8} {'correct':>8}  picked")
+    for label, bandwidth in BANDWIDTHS:
+        server = MockGroqServer(latency=0.2, bandwidth=bandwidth).start()
+        for audio_format in FORMATS:
+            latencies, correct, chosen = await run(server.url, audio_format, clips)
+            picked = ", ".join(f"{name} x{count}" for name, count in chosen.most_common(3))
+            print(f"{label:<10} {audio_format:<6} {latencies.mean():>9.2f} "
+                  f"{np.percentile(latencies, 95):>8.2f} {correct:>5}/{len(clips)}  {picked}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
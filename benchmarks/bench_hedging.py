@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark hedged requests against a mock server with a slow tail
+
+    python3 benchmarks/bench_hedging.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_server import MockGroqServer
+from benchmarks.synth import TONE_VOCABULARY, tone_words
+from config import Config
+from transcribers import create_transcriber
+
+SAMPLE_RATE = 16000
+REQUESTS = 40
+
+
+def make_config(url: str, hedge: bool) -> Config:
+    config = Config()
+    config.groq_api_key = "mock"
+    config.api_base_url = url
+    config.audio_format = "wav"
+    config.backends = []
+    config.rate_limiter = False  # the mock server has no rate limits
+    config.hedge_requests = config.hedge_same_backend = hedge
+    config.hedge_delay_seconds = 0.5
+    return config
+
+
+async def measure(config: Config, audio: np.ndarray):
+    transcriber = create_transcriber(config)
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        await transcriber.transcribe(audio, SAMPLE_RATE)
+        latencies.append(time.perf_counter() - start)
+    await transcriber.close()
+    return np.percentile(latencies, [50, 95, 99])
+
+
+async def main():
+    # 10% of requests take an extra 2 seconds
+    server = MockGroqServer(latency=0.2, tail_probability=0.1, tail_latency=2.0).start()
+    word_ids = np.random.default_rng(0).integers(0, TONE_VOCABULARY, 10)
+    audio = (tone_words(word_ids, SAMPLE_RATE) * 32767).astype(np.int16)
+
+    print(f"{'mode':<10} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8}")
+    for hedge in (False, True):
+        p50, p95, p99 = await measure(make_config(server.url, hedge), audio)
+        print(f"{'hedged' if hedge else 'single':<10} {p50:>8.2f} {p95:>8.2f} {p99:>8.2f}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Benchmark hotkey handling with synthetic key events
+
+Plays a scripted sequence of double presses (start, stop) into the hotkey
+state machine, once with actions run inline in the listener callback (as
+before) and once through HotkeyController. Stopping is made artificially slow
+to stand in for closing the stream at the end of a long recording. Reports how
+long the listener callback is blocked and how long after its key event each
+action starts.
+
+    python3 benchmarks/bench_hotkeys.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hotkeys import HOTKEY, START, STOP, HotkeyController, HotkeyStateMachine
+
+CYCLES = 20
+PRESS_GAP = 0.1       # between the two presses of a double press
+RECORD_SECONDS = 0.3  # between start and stop
+STOP_WORK = 0.15      # simulated stream shutdown
+
+
+class FakeApp:
+    def __init__(self):
+        self.recording = False
+        self.dispatch = []
+
+    def start(self, timestamp):
+        self.dispatch.append(time.perf_counter() - timestamp)
+        self.recording = True
+
+    def stop(self, timestamp):
+        self.dispatch.append(time.perf_counter() - timestamp)
+        time.sleep(STOP_WORK)
+        self.recording = False
+
+
+def script():
+    """Key press times: a double press to start, another to stop, per cycle"""
+    times, t = [], 0.0
+    for _ in range(CYCLES):
+        times += [t, t + PRESS_GAP]
+        t += PRESS_GAP + RECORD_SECONDS
+        times += [t, t + PRESS_GAP]
+        t += PRESS_GAP + 0.6  # idle long enough that presses don't pair across cycles
+    return times
+
+
+def play(callback):
+    """Call `callback` at the scripted times; returns how long each call blocked"""
+    blocked = []
+    origin = time.perf_counter()
+    for at in script():
+        time.sleep(max(0.0, origin + at - time.perf_counter()))
+        start = time.perf_counter()
+        callback()
+        blocked.append(time.perf_counter() - start)
+    return blocked
+
+
+def inline():
+    app = FakeApp()
+    machine = HotkeyStateMachine()
+    actions = {START: app.start, STOP: app.stop}
+
+    def on_press():
+        timestamp = time.perf_counter()
+        action = machine.on_event(HOTKEY, timestamp, app.recording)
+        if action:
+            actions[action](timestamp)
+
+    return play(on_press), app.dispatch
+
+
+def queued():
+    app = FakeApp()
+    controller = HotkeyController(HotkeyStateMachine(), lambda: app.recording,
+                                  {START: app.start, STOP: app.stop})
+    controller.start()
+    blocked = play(lambda: controller.push(HOTKEY))
+    time.sleep(STOP_WORK * 2)
+    controller.stop()
+    return blocked, app.dispatch
+
+
+def main():
+    print(f"{CYCLES} start/stop cycles, stop takes {STOP_WORK * 1000:.0f} ms")
+    print(f"{'mode':<12} {'callback p50':>13} {'callback max':>13} {'dispatch p50':>13} "
+          f"{'dispatch max':>13} {'actions':>8}")
+    for name, run in (("inline", inline), ("controller", queued)):
+        blocked, dispatch = run()
+        blocked_ms = np.array(blocked) * 1000
+        dispatch_ms = np.array(dispatch) * 1000
+        print(f"{name:<12} {np.percentile(blocked_ms, 50):>10.3f} ms {blocked_ms.max():>10.3f} ms "
+              f"{np.percentile(dispatch_ms, 50):>10.3f} ms {dispatch_ms.max():>10.3f} ms "
+              f"{len(dispatch):>8}")
+
+
+if __name__ == "__main__":
+    main()
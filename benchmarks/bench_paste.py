@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark paste latency against a fake clipboard
+
+Compares the old path (a clipboard subprocess, then a fixed 100 ms sleep
+before Cmd+V) with ClipboardPaster on in-process clipboards that become
+readable immediately or only after a delay, as subprocess tools that serve
+the selection from a forked process do.
+
+    python3 benchmarks/bench_paste.py
+"""
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import fakes
+
+fakes.install()
+
+from clipboard import MemoryClipboard  # noqa: E402
+from config import Config  # noqa: E402
+from dictation import ClipboardPaster  # noqa: E402
+
+PASTES = 30
+TEXT = "The quick brown fox jumps over the lazy dog. " * 4
+
+
+class FakeClipboard(MemoryClipboard):
+    """In-process stand-in for the system clipboard, so the paste keystroke is sent"""
+    name = "fake"
+    shared = True
+
+
+class LaggyClipboard(FakeClipboard):
+    """Written text only becomes readable after `lag` seconds"""
+    name = "laggy"
+
+    def __init__(self, lag: float):
+        super().__init__()
+        self.lag = lag
+
+    def write(self, text: str):
+        timer = threading.Timer(self.lag, lambda: setattr(self, "text", text))
+        timer.start()
+
+
+def old_paste(text: str):
+    # Stand-in for pbcopy: one subprocess fed the text, then the fixed sleep
+    subprocess.run(["cat"], input=text.encode('utf-8'), stdout=subprocess.DEVNULL, check=True)
+    time.sleep(0.1)
+
+
+def new_paster(clipboard) -> ClipboardPaster:
+    config = Config()
+    config.clipboard_backend = "memory"
+    config.restore_clipboard = False
+    paster = ClipboardPaster(config)
+    paster.clipboard = clipboard
+    return paster
+
+
+def measure(paste) -> np.ndarray:
+    latencies = []
+    for i in range(PASTES):
+        text = f"{TEXT}{i}"
+        start = time.perf_counter()
+        paste(text)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def main():
+    cases = [
+        ("subprocess + 100 ms sleep (old)", old_paste),
+        ("in-process, ready at once", new_paster(FakeClipboard()).paste_text),
+        ("in-process, ready after 5 ms", new_paster(LaggyClipboard(0.005)).paste_text),
+        ("in-process, ready after 30 ms", new_paster(LaggyClipboard(0.03)).paste_text),
+    ]
+    print(f"{'path':<34} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}")
+    for name, paste in cases:
+        latencies = measure(paste)
+        p50, p95 = np.percentile(latencies, [50, 95])
+        print(f"{name:<34} {p50:>9.2f} {p95:>9.2f} {latencies.max():>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark a burst of dictations against a rate-limited mock server
+
+Like Groq's free tier, the server accepts 20 requests per minute and its
+x-ratelimit-*-requests headers report the daily quota. Without the limiter
+the burst relies on the OpenAI client's own retries; with it, requests
+queue locally behind the per-minute limit. The last run adds the default
+hedging, whose 5 second request timeout must not count the time queued.
+
+    python3 benchmarks/bench_ratelimit.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.mock_server import MockGroqServer
+from benchmarks.synth import TONE_VOCABULARY, tone_words
+from config import Config
+from transcribers import create_transcriber
+
+SAMPLE_RATE = 16000
+DICTATIONS = 25
+LIMIT = 20
+WINDOW = 60.0
+TIMEOUT = 5.0
+MODES = [("plain", False, False), ("limiter", True, False), ("limit+hedge", True, True)]
+
+
+def make_config(url: str, mode: str, limiter: bool, hedge: bool) -> Config:
+    config = Config()
+    # A separate key per run, so each gets a fresh shared limiter
+    config.groq_api_key = f"mock-{mode}"
+    config.api_base_url = url
+    config.audio_format = "wav"
+    config.backends = []
+    config.hedge_requests = config.hedge_same_backend = hedge
+    config.request_timeout = TIMEOUT
+    config.rate_limiter = limiter
+    config.rate_limit_requests_per_minute = LIMIT * 60 / WINDOW
+    return config
+
+
+async def burst(config: Config, audio: np.ndarray):
+    transcriber = create_transcriber(config)
+
+    async def dictate():
+        start = time.perf_counter()
+        try:
+            await transcriber.transcribe(audio, SAMPLE_RATE)
+            return time.perf_counter() - start
+        except Exception:
+            return None
+
+    results = await asyncio.gather(*(dictate() for _ in range(DICTATIONS)))
+    await transcriber.close()
+    return [r for r in results if r is not None], results.count(None)
+
+
+async def main():
+    word_ids = np.random.default_rng(0).integers(0, TONE_VOCABULARY, 6)
+    audio = (tone_words(word_ids, SAMPLE_RATE) * 32767).astype(np.int16)
+
+    print(f"{'mode':<12} {'ok':>4} {'failed':>7} {'429s':>5} {'p50 (s)':>8} {'max (s)':>8}")
+    for mode, limiter, hedge in MODES:
+        server = MockGroqServer(latency=0.2, rate_limit=LIMIT, rate_window=WINDOW).start()
+        latencies, failed = await burst(make_config(server.url, mode, limiter, hedge), audio)
+        p50 = np.percentile(latencies, 50) if latencies else float("nan")
+        worst = max(latencies) if latencies else float("nan")
+        print(f"{mode:<12} {len(latencies):>4} {failed:>7} "
+              f"{server.rejected:>5} {p50:>8.2f} {worst:>8.2f}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
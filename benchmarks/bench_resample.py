@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark native-rate capture with in-process resampling against 16 kHz capture
+
+Replays 60 s of audio through a fake microphone into AudioRecorder, once with
+the device opened at 16 kHz (the old path, where PortAudio or the OS does the
+conversion) and once at common native rates with PolyphaseResampler in the
+audio callback. Reports callback CPU as a share of real time, the time to
+stop and hand over the recording, and resampling quality compared to plain
+linear interpolation.
+
+    python3 benchmarks/bench_resample.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import fakes
+
+fakes.install(fake_audio=True)
+
+import sounddevice as sd  # noqa: E402  (the fake registered above)
+
+from audio_device import PolyphaseResampler  # noqa: E402
+from config import Config  # noqa: E402
+from dictation import AudioRecorder  # noqa: E402
+
+TARGET_RATE = 16000
+SECONDS = 60
+NATIVE_RATES = (16000, 22050, 44100, 48000)
+
+
+def tone(frequency: float, rate: int, seconds: float, level: float = 0.3) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * frequency * t) * level * 32767).astype(np.int16)
+
+
+def measure_capture(native_rate: int, resample_in_process: bool):
+    """Capture CPU as % of real time, ms to stop and hand over, samples captured"""
+    config = Config()
+    config.spool_after_seconds = None
+    config.capture_native_rate = resample_in_process
+    sd.native_rate = native_rate
+    sd.source = tone(440, native_rate if resample_in_process else TARGET_RATE, SECONDS)
+
+    recorder = AudioRecorder(config)
+    cpu_start = time.process_time()  # includes the stream thread running the callback
+    recorder.start_recording()
+    recorder.stream.finished.wait()
+    cpu_seconds = time.process_time() - cpu_start
+    stop_start = time.perf_counter()
+    audio = recorder.stop_recording()
+    stop_seconds = time.perf_counter() - stop_start
+    return cpu_seconds / SECONDS * 100, stop_seconds * 1000, len(audio)
+
+
+def quality(native_rate: int):
+    """SNR of a 440 Hz tone, and the level left of a 9.5 kHz tone that must be removed"""
+    reference = tone(440, TARGET_RATE, 2).astype(np.float64)
+    source = tone(440, native_rate, 2)
+    positions = np.arange(len(reference)) * native_rate / TARGET_RATE
+
+    polyphase = PolyphaseResampler(native_rate, TARGET_RATE).resample(source).astype(np.float64)
+    linear = np.interp(positions, np.arange(len(source)), source)
+
+    def snr(signal):
+        # Best over small integer lags, so the filter delay is not counted as error
+        n = len(reference) - 2000
+        power = np.mean(reference[1000:1000 + n] ** 2)
+        error = min(np.mean((signal[1000 + lag:1000 + lag + n] - reference[1000:1000 + n]) ** 2)
+                    for lag in range(64))
+        return 10 * np.log10(power / max(error, 1e-12))
+
+    above_nyquist = tone(9500, native_rate, 2) if native_rate > 19000 else None
+
+    def alias_db(resampled):
+        level = np.sqrt(np.mean(resampled[500:-500].astype(np.float64) ** 2))
+        return 20 * np.log10(level / (0.3 * 32767 / np.sqrt(2)) + 1e-12)
+
+    if above_nyquist is None:
+        return snr(polyphase), snr(linear), None, None
+    alias_polyphase = alias_db(PolyphaseResampler(native_rate, TARGET_RATE).resample(above_nyquist))
+    alias_linear = alias_db(np.interp(positions, np.arange(len(above_nyquist)), above_nyquist))
+    return snr(polyphase), snr(linear), alias_polyphase, alias_linear
+
+
+def main():
+    print(f"Capture of {SECONDS} s through AudioRecorder")
+    print(f"{'device rate':>11} {'path':<22} {'CPU (% of realtime)':>20} {'stop (ms)':>10} {'samples':>9}")
+    baseline = measure_capture(TARGET_RATE, False)
+    print(f"{TARGET_RATE:>11} {'16 kHz capture (old)':<22} {baseline[0]:>20.2f} {baseline[1]:>10.2f} {baseline[2]:>9}")
+    for rate in NATIVE_RATES[1:]:
+        cpu, stop, samples = measure_capture(rate, True)
+        print(f"{rate:>11} {'native + polyphase':<22} {cpu:>20.2f} {stop:>10.2f} {samples:>9}")
+
+    print()
+    print("Resampling quality to 16 kHz")
+    print(f"{'device rate':>11} {'SNR polyphase':>14} {'SNR linear':>11} {'alias polyphase':>16} {'alias linear':>13}")
+    for rate in NATIVE_RATES[1:]:
+        snr_poly, snr_linear, alias_poly, alias_linear = quality(rate)
+        alias = (f"{alias_poly:>15.1f}dB {alias_linear:>11.1f}dB" if alias_poly is not None
+                 else f"{'-':>17} {'-':>13}")
+        print(f"{rate:>11} {snr_poly:>12.1f}dB {snr_linear:>9.1f}dB {alias}")
+
+
+if __name__ == "__main__":
+    main()
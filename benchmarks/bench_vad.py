@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Benchmark VAD trimming on synthetic dictation clips
+
+    python3 benchmarks/bench_vad.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synth import dictation_clip, silence
+from vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+
+def time_trim(vad, audio, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = vad.trim(audio)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    print(f"{'clip':<22} {'level':>5} {'in (s)':>8} {'out (s)':>8} {'saved':>7} {'time (ms)':>10}")
+    clips = [(f"speech {s}s", dictation_clip(s, seed=s)) for s in (5, 30, 120)]
+    clips.append(("silence 10s", silence(10, SAMPLE_RATE)))
+
+    for name, audio in clips:
+        for level in range(4):
+            vad = VoiceActivityDetector(SAMPLE_RATE, aggressiveness=level)
+            result, seconds = time_trim(vad, audio)
+            length_in = len(audio) / SAMPLE_RATE
+            length_out = 0.0 if result is None else len(result) / SAMPLE_RATE
+            saved = 1 - length_out / length_in
+            print(f"{name:<22} {level:>5} {length_in:>8.2f} {length_out:>8.2f} "
+                  f"{saved:>6.0%} {seconds * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
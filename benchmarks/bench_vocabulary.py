@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark the custom vocabulary engine against one regex per entry
+
+For dictionaries of growing size, reports the time to apply them to a
+typical transcript, the time to compile the vocabulary file, and the time
+to load the compiled form from the cache instead.
+
+    python3 benchmarks/bench_vocabulary.py
+"""
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vocabulary import Vocabulary, parse_entries
+
+SIZES = [100, 1000, 10000, 50000]
+NAIVE_MAX = 10000  # compiling more regexes than this takes too long to wait for
+REPEATS = 200
+SYLLABLES = ["ka", "zo", "ri", "mel", "tan", "vex", "lu", "dor", "pi", "shen", "ox", "qua"]
+
+
+def make_terms(count: int, rng) -> list:
+    terms = set()
+    while len(terms) < count:
+        words = [
+            "".join(rng.choice(SYLLABLES, rng.integers(2, 5)))
+            for _ in range(rng.integers(1, 3))
+        ]
+        terms.add(" ".join(words))
+    return sorted(terms)
+
+
+def make_file(terms: list) -> str:
+    # Alternate plain terms (case fixes) and corrections
+    lines = []
+    for i, term in enumerate(terms):
+        lines.append(term.title() if i % 2 else f"{term} => {term.upper()}")
+    return "\n".join(lines) + "\n"
+
+
+def make_transcript(terms: list, rng) -> str:
+    words = ("so I was thinking that we could move the meeting to next week and "
+             "then review the numbers with the team before we ship it").split()
+    for term in rng.choice(terms, 5):
+        words.insert(int(rng.integers(0, len(words))), term)
+    return " ".join(words).capitalize() + "."
+
+
+class NaiveReplacer:
+    """What the engine replaces: one compiled regex per entry, applied in turn"""
+    def __init__(self, entries):
+        self.rules = [(re.compile(rf"\b{re.escape(pattern)}\b", 0 if case_sensitive else re.IGNORECASE),
+                       replacement) for pattern, replacement, case_sensitive in entries]
+
+    def apply(self, text: str) -> str:
+        for regex, replacement in self.rules:
+            text = regex.sub(replacement, text)
+        return text
+
+
+def per_call_us(apply, text: str) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        apply(text)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'entries':>8} {'engine (us)':>12} {'regex (us)':>11} {'compile (ms)':>13} {'cached (ms)':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            terms = make_terms(size, rng)
+            path = Path(directory) / f"vocabulary-{size}.txt"
+            path.write_text(make_file(terms))
+            cache_dir = Path(directory) / "cache"
+            text = make_transcript(terms, rng)
+
+            start = time.perf_counter()
+            vocabulary = Vocabulary.from_file(path, cache_dir)
+            compile_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            cached = Vocabulary.from_file(path, cache_dir)
+            cached_ms = (time.perf_counter() - start) * 1000
+            assert cached.apply(text) == vocabulary.apply(text)
+
+            engine_us = per_call_us(vocabulary.apply, text)
+            naive_us = float("nan")
+            if size <= NAIVE_MAX:
+                naive = NaiveReplacer(parse_entries(path.read_text()))
+                naive_us = per_call_us(naive.apply, text)
+            print(f"{size:>8} {engine_us:>12.1f} {naive_us:>11.1f} {compile_ms:>13.1f} {cached_ms:>12.1f}")
+    print(f"\nSample: {text}\n     -> {vocabulary.apply(text)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Paste regression check: the paste keystroke only goes with the system clipboard
+
+With a clipboard that other apps cannot see (the memory backend, also the
+fallback when no clipboard tool is installed), Cmd/Ctrl+V would paste
+whatever the system clipboard held before. Checks that ClipboardPaster
+types the transcript instead, and still pastes with a shared clipboard.
+
+    python3 benchmarks/check_clipboard.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import fakes
+
+fakes.install()
+
+from clipboard import MemoryClipboard  # noqa: E402
+from config import Config  # noqa: E402
+from dictation import ClipboardPaster  # noqa: E402
+
+TEXT = "Hello from the check."
+
+
+class RecordingKeyboard:
+    def __init__(self):
+        self.events = []
+
+    def press(self, key):
+        self.events.append(("press", key))
+
+    def release(self, key):
+        self.events.append(("release", key))
+
+    def type(self, text):
+        self.events.append(("type", text))
+
+
+class SharedClipboard(MemoryClipboard):
+    name = "shared"
+    shared = True
+
+
+def paste(clipboard) -> list:
+    config = Config()
+    config.clipboard_backend = "memory"
+    config.restore_clipboard = False
+    config.auto_paste = True
+    paster = ClipboardPaster(config)
+    paster.clipboard = clipboard
+    paster.keyboard = RecordingKeyboard()
+    paster.paste_text(TEXT)
+    return paster.keyboard.events
+
+
+def main() -> int:
+    failures = []
+    events = paste(MemoryClipboard())
+    if any(kind == "press" for kind, _ in events):
+        failures.append(f"memory clipboard sent a keystroke: {events}")
+    if ("type", TEXT) not in events:
+        failures.append(f"memory clipboard did not type the text: {events}")
+
+    events = paste(SharedClipboard())
+    if ("press", "v") not in events or any(kind == "type" for kind, _ in events):
+        failures.append(f"shared clipboard did not paste with the keystroke: {events}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: memory clipboard types, shared clipboard pastes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Startup regression check: fails if the app is slow to become ready
+
+Starts the app headless (hardware modules faked where unavailable) under
+-X importtime, prints the import breakdown and exits non-zero if the hotkey
+listener and status item took longer than the budget to come up, or if the
+API client or PortAudio were imported on the way.
+
+    python3 benchmarks/check_startup.py --budget 1.0
+"""
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=main.STARTUP_BUDGET_SECONDS,
+                        help="seconds until the app must be ready")
+    args = parser.parse_args()
+
+    # A throwaway home, so no user config or spool files are picked up
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = home
+        os.environ.setdefault("GROQ_API_KEY", "mock")
+        sys.exit(main.profile_startup(args.budget, "from benchmarks import fakes\nfakes.install()"))
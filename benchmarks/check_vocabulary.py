@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Vocabulary regression check: replacements keep a capital only at sentence start
+
+A transcript that capitalizes a matched phrase mid-sentence ("use Cube
+Control") must get the replacement as written ("kubectl"); at the start of
+the transcript or of a sentence it keeps its capital. Also checks that an
+edited vocabulary file is picked up without blocking the caller.
+
+    python3 benchmarks/check_vocabulary.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config  # noqa: E402
+from vocabulary import Vocabulary, get_vocabulary, parse_entries  # noqa: E402
+
+ENTRIES = "cube control => kubectl\ngonna => going to\nGitHub\n"
+CASES = [
+    ("use Cube Control to deploy", "use kubectl to deploy"),
+    ("use cube control to deploy", "use kubectl to deploy"),
+    ("Cube control is ready", "Kubectl is ready"),
+    ("It works. Gonna ship it", "It works. Going to ship it"),
+    ("Really? \"Gonna ship it\"", "Really? \"Going to ship it\""),
+    ("we are Gonna ship it on github", "we are going to ship it on GitHub"),
+]
+
+
+def check_rebuild(failures: list):
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "vocabulary.txt"
+        path.write_text("foo => bar\n")
+        config = Config()
+        config.vocabulary_file = str(path)
+        config.cache_dir = str(Path(directory) / "cache")
+        if get_vocabulary(config).apply("foo") != "bar":
+            failures.append("first load did not apply")
+            return
+        path.write_text("foo => baz\n" + "".join(f"term{i}\n" for i in range(20000)))
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        start = time.perf_counter()
+        stale = get_vocabulary(config)
+        if time.perf_counter() - start > 0.05:
+            failures.append("an edited file was compiled in the caller")
+        if stale.apply("foo") != "bar":
+            failures.append("the previous vocabulary was not kept while rebuilding")
+        deadline = time.perf_counter() + 10
+        while get_vocabulary(config).apply("foo") != "baz":
+            if time.perf_counter() > deadline:
+                failures.append("the edited vocabulary was never swapped in")
+                return
+            time.sleep(0.01)
+
+
+def main() -> int:
+    vocabulary = Vocabulary(parse_entries(ENTRIES))
+    failures = []
+    for text, expected in CASES:
+        result = vocabulary.apply(text)
+        if result != expected:
+            failures.append(f"{text!r} -> {result!r}, expected {expected!r}")
+    check_rebuild(failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print(f"OK: {len(CASES)} capitalization cases, background rebuild")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
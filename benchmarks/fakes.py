@@ -0,0 +1,128 @@
+"""Stand-ins for hardware-bound modules so benchmarks run headless
+
+`install()` must run before `dictation` is imported. Real modules are used
+when they import cleanly; otherwise minimal fakes are registered.
+"""
+import sys
+import threading
+import time
+import types
+
+
+def _fake_sounddevice():
+    """sounddevice whose input streams replay `module.source` through the callback.
+
+    Blocks are delivered from a background thread like PortAudio does, either
+    as fast as possible or, with `module.realtime`, at the stream's sample rate.
+    The single fake device reports `module.native_rate` as its default rate.
+    """
+    module = types.ModuleType("sounddevice")
+    module.source = None
+    module.realtime = False
+    module.native_rate = 16000
+
+    class PortAudioError(Exception):
+        pass
+
+    def query_devices(device=None, kind=None):
+        info = {"name": "Fake microphone", "max_input_channels": 1,
+                "default_samplerate": float(module.native_rate)}
+        if device not in (None, 0):
+            raise ValueError(f"No input device matching {device!r}")
+        return info if kind is not None or device is not None else [info]
+
+    class InputStream:
+        def __init__(self, callback=None, samplerate=16000, channels=1, blocksize=0, **kwargs):
+            self.callback = callback
+            self.samplerate = samplerate
+            self.channels = channels
+            self.blocksize = blocksize or 512
+            self.finished = threading.Event()
+            self._stopped = threading.Event()
+            self._thread = None
+
+        def start(self):
+            source = module.source
+            if source is None or self.callback is None:
+                self.finished.set()
+                return
+            self._thread = threading.Thread(target=self._play, args=(source,), daemon=True)
+            self._thread.start()
+
+        def _play(self, source):
+            source = source.reshape(len(source), -1)
+            started = time.perf_counter()
+            for start in range(0, len(source), self.blocksize):
+                if self._stopped.is_set():
+                    break
+                block = source[start:start + self.blocksize]
+                self.callback(block, len(block), None, None)
+                if module.realtime:
+                    due = started + (start + len(block)) / self.samplerate
+                    time.sleep(max(0.0, due - time.perf_counter()))
+            self.finished.set()
+
+        def stop(self):
+            self._stopped.set()
+            if self._thread is not None:
+                self._thread.join()
+
+        def close(self):
+            pass
+
+    module.InputStream = InputStream
+    module.PortAudioError = PortAudioError
+    module.query_devices = query_devices
+    return module
+
+
+def _fake_pynput():
+    pynput = types.ModuleType("pynput")
+    keyboard = types.ModuleType("pynput.keyboard")
+
+    class Key:
+        cmd = "cmd"
+        cmd_r = "cmd_r"
+        ctrl = "ctrl"
+        esc = "esc"
+
+    class Listener:
+        def __init__(self, **callbacks):
+            self.callbacks = callbacks
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+    class Controller:
+        def press(self, key):
+            pass
+
+        def release(self, key):
+            pass
+
+        def type(self, text):
+            pass
+
+    keyboard.Key = Key
+    keyboard.Listener = Listener
+    keyboard.Controller = Controller
+    pynput.keyboard = keyboard
+    return {"pynput": pynput, "pynput.keyboard": keyboard}
+
+
+def install(fake_audio: bool = False):
+    """Register fakes; `fake_audio` replaces sounddevice even when it works"""
+    if fake_audio:
+        sys.modules["sounddevice"] = _fake_sounddevice()
+    else:
+        try:
+            import sounddevice  # noqa: F401
+        except (ImportError, OSError):
+            sys.modules["sounddevice"] = _fake_sounddevice()
+    try:
+        from pynput import keyboard  # noqa: F401
+    except Exception:
+        sys.modules.update(_fake_pynput())
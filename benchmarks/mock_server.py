@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Local OpenAI/Groq-compatible transcription server for benchmarks
+
+Decodes the uploaded audio and answers with the "tone words" it contains
+(see synth.tone_words), after a configurable latency and upload bandwidth. With a rate limit it
+behaves like Groq: requests over the per-minute limit get a 429 and
+retry-after, while the x-ratelimit-*-requests headers report the daily quota.
+
+    python3 benchmarks/mock_server.py --port 8765 --latency 0.3 --bandwidth 250000
+"""
+import argparse
+import io
+import json
+import random
+import sys
+import threading
+import time
+import wave
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synth import decode_tone_words
+
+
+def multipart_fields(content_type: str, body: bytes) -> dict:
+    """Parse a multipart/form-data body into {field name: bytes}"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body)
+    return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+            for part in message.iter_parts()}
+
+
+def decode_upload(data: bytes):
+    """Return (int16 samples, sample rate) for a WAV, FLAC or Ogg upload"""
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav_file:
+            frames = wav_file.readframes(wav_file.getnframes())
+            return np.frombuffer(frames, dtype=np.int16), wav_file.getframerate()
+    except wave.Error:
+        import soundfile
+        audio, sample_rate = soundfile.read(io.BytesIO(data), dtype='int16')
+        return audio, sample_rate
+
+
+class MockGroqServer:
+    """Threaded HTTP server with latency, bandwidth and load knobs"""
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2,
+                 latency_per_audio_second: float = 0.02, bandwidth: float = None,
+                 tail_probability: float = 0.0, tail_latency: float = 0.0, seed: int = 0,
+                 rate_limit: int = 0, rate_window: float = 60.0, daily_limit: int = 14400):
+        self.latency = latency
+        self.latency_per_audio_second = latency_per_audio_second
+        self.bandwidth = bandwidth  # upload bytes per second, None for unlimited
+        # A fraction of requests is slowed down to create a latency tail
+        self.tail_probability = tail_probability
+        self.tail_latency = tail_latency
+        self.random = random.Random(seed)
+        # At most `rate_limit` requests per `rate_window` seconds, refilled
+        # continuously, 0 for none. Like Groq's, the headers don't show this
+        # limit but the requests per day.
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.daily_limit = daily_limit
+        self.allowance = float(rate_limit)
+        self.refilled = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.requests = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/openai/v1"
+
+    def start(self) -> "MockGroqServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _admit(self):
+        """(accepted, rate-limit headers) for a request arriving now"""
+        if not self.rate_limit:
+            return True, {}
+        with self._lock:
+            now = time.monotonic()
+            per_second = self.rate_limit / self.rate_window
+            self.allowance = min(self.rate_limit, self.allowance + (now - self.refilled) * per_second)
+            self.refilled = now
+            accepted = self.allowance >= 1
+            if accepted:
+                self.allowance -= 1
+                self.accepted += 1
+            else:
+                self.rejected += 1
+            headers = {
+                "x-ratelimit-limit-requests": str(self.daily_limit),
+                "x-ratelimit-remaining-requests": str(self.daily_limit - self.accepted),
+                "x-ratelimit-reset-requests": f"{self.accepted * 86400 / self.daily_limit:.2f}s",
+            }
+            if not accepted:
+                headers["retry-after"] = f"{(1 - self.allowance) / per_second:.2f}"
+            return accepted, headers
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client gave up, e.g. a cancelled hedged request
+
+            def _read_body(self) -> bytes:
+                # Throttle reads to emulate a slow uplink
+                remaining = int(self.headers.get("Content-Length", 0))
+                chunks = []
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, 16384))
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    remaining -= len(chunk)
+                    if server.bandwidth:
+                        time.sleep(len(chunk) / server.bandwidth)
+                return b"".join(chunks)
+
+            def do_GET(self):
+                if self.path.endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [
+                        {"id": "whisper-large-v3-turbo", "object": "model", "owned_by": "mock"}]})
+                elif self.path.endswith("/stats"):
+                    # For benchmarks that run the server in another process
+                    with server._lock:
+                        self._send_json(200, {"requests": server.requests, "rejected": server.rejected,
+                                              "bytes_received": server.bytes_received})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                if not self.path.endswith("/audio/transcriptions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                body = self._read_body()
+                accepted, limit_headers = server._admit()
+                if not accepted:
+                    self._send_json(429, {"error": {"message": "Rate limit reached",
+                                                    "type": "requests", "code": "rate_limit_exceeded"}},
+                                    limit_headers)
+                    return
+                fields = multipart_fields(self.headers["Content-Type"], body)
+                audio, sample_rate = decode_upload(fields["file"])
+                seconds = len(audio) / sample_rate
+                with server._lock:
+                    server.requests += 1
+                    server.bytes_received += len(body)
+                    slow = server.random.random() < server.tail_probability
+                delay = server.latency + seconds * server.latency_per_audio_second
+                time.sleep(delay + (server.tail_latency if slow else 0.0))
+                text = " ".join(decode_tone_words(audio, sample_rate))
+                self._send_json(200, {"text": text}, limit_headers)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--per-audio-second", type=float, default=0.02,
+                        help="extra seconds per second of audio")
+    parser.add_argument("--bandwidth", type=float, default=None, help="upload bytes per second")
+    parser.add_argument("--tail-probability", type=float, default=0.0,
+                        help="fraction of requests that are slowed down")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="extra seconds for slow requests")
+    parser.add_argument("--rate-limit", type=int, default=0, help="requests allowed per window, 0 for no limit")
+    parser.add_argument("--daily-limit", type=int, default=14400, help="requests per day shown in the headers")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="rate limit window in seconds")
+    args = parser.parse_args()
+
+    server = MockGroqServer(port=args.port, latency=args.latency,
+                            latency_per_audio_second=args.per_audio_second,
+                            bandwidth=args.bandwidth, tail_probability=args.tail_probability,
+                            tail_latency=args.tail_latency, rate_limit=args.rate_limit,
+                            rate_window=args.rate_window, daily_limit=args.daily_limit)
+    print(f"Mock server listening on {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
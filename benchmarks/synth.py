@@ -0,0 +1,103 @@
+"""Synthetic, speech-like test audio for the benchmarks"""
+import numpy as np
+
+
+def silence(seconds: float, sample_rate: int = 16000, noise_db: float = -65.0,
+            seed: int = 0) -> np.ndarray:
+    """Low-level background noise"""
+    rng = np.random.default_rng(seed)
+    amplitude = 10 ** (noise_db / 20)
+    return (rng.standard_normal(int(seconds * sample_rate)) * amplitude).astype(np.float32)
+
+
+def speech_like(seconds: float, sample_rate: int = 16000, seed: int = 0,
+                level_db: float = -20.0) -> np.ndarray:
+    """Voiced syllables (harmonic stacks with a pitch contour) and fricative bursts"""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    out = silence(seconds, sample_rate, seed=seed + 1)
+    amplitude = 10 ** (level_db / 20)
+
+    position = 0
+    while position < total:
+        length = int(rng.uniform(0.12, 0.3) * sample_rate)
+        end = min(position + length, total)
+        n = end - position
+        t = np.arange(n) / sample_rate
+        envelope = np.hanning(n)
+        if rng.random() < 0.2:
+            burst = rng.standard_normal(n) * envelope * amplitude * 0.3
+        else:
+            f0 = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))
+            phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+            harmonics = sum(np.sin(k * phase) / k for k in range(1, 6))
+            burst = harmonics * envelope * amplitude
+        out[position:end] += burst.astype(np.float32)
+        # Short gaps between syllables, longer ones between words
+        gap = rng.uniform(0.02, 0.06) if rng.random() < 0.7 else rng.uniform(0.15, 0.3)
+        position = end + int(gap * sample_rate)
+    return out
+
+
+def dictation_clip(speech_seconds: float, lead: float = 1.0, trail: float = 1.0,
+                   pause: float = 2.0, sample_rate: int = 16000, seed: int = 0) -> np.ndarray:
+    """Speech split in two halves by a long pause, with silence at both ends"""
+    half = speech_seconds / 2
+    return np.concatenate([
+        silence(lead, sample_rate, seed=seed),
+        speech_like(half, sample_rate, seed=seed + 10),
+        silence(pause, sample_rate, seed=seed + 20),
+        speech_like(half, sample_rate, seed=seed + 30),
+        silence(trail, sample_rate, seed=seed + 40),
+    ])
+
+
+# "Tone words": each word is a pure tone whose pitch encodes its index, so the
+# mock server can produce a deterministic transcript for any slice of audio.
+TONE_BASE_HZ = 400.0
+TONE_STEP_HZ = 40.0
+TONE_VOCABULARY = 50
+TONE_WORD_SECONDS = 0.25
+TONE_GAP_SECONDS = 0.1
+
+
+def tone_words(word_ids, sample_rate: int = 16000, level_db: float = -20.0) -> np.ndarray:
+    """Render a sequence of word indices as tones separated by short gaps"""
+    amplitude = 10 ** (level_db / 20)
+    n_word = int(TONE_WORD_SECONDS * sample_rate)
+    n_gap = int(TONE_GAP_SECONDS * sample_rate)
+    t = np.arange(n_word) / sample_rate
+    fade = np.minimum(1.0, np.minimum(t, t[::-1]) / 0.01)
+    out = silence(len(word_ids) * (TONE_WORD_SECONDS + TONE_GAP_SECONDS), sample_rate)
+    for i, word in enumerate(word_ids):
+        frequency = TONE_BASE_HZ + TONE_STEP_HZ * word
+        start = i * (n_word + n_gap)
+        out[start:start + n_word] += (np.sin(2 * np.pi * frequency * t) * fade * amplitude).astype(np.float32)
+    return out
+
+
+def decode_tone_words(audio: np.ndarray, sample_rate: int = 16000) -> list:
+    """Inverse of tone_words; words cut to under 40% of their length are dropped"""
+    if audio.dtype == np.int16:
+        audio = audio.astype(np.float32) / 32768.0
+    frame = sample_rate // 100
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    loud = np.sqrt(np.mean(np.square(frames), axis=1)) > 0.01
+    edges = np.diff(np.concatenate(([0], loud.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    words = []
+    min_frames = int(TONE_WORD_SECONDS * 100 * 0.4)
+    for start, end in zip(starts, ends):
+        if end - start < min_frames:
+            continue
+        segment = audio[start * frame:end * frame]
+        spectrum = np.abs(np.fft.rfft(segment * np.hanning(len(segment))))
+        frequency = np.argmax(spectrum) * sample_rate / len(segment)
+        word = int(round((frequency - TONE_BASE_HZ) / TONE_STEP_HZ))
+        if 0 <= word < TONE_VOCABULARY:
+            words.append(f"w{word}")
+    return words
@@ -0,0 +1,110 @@
+import re
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Samples read at a time when measuring energy, so long recordings are never copied whole
+BLOCK_SAMPLES = 1 << 20
+
+
+def splice(audio: np.ndarray, keep: Optional[List[Tuple[int, int]]], start: int, end: int) -> np.ndarray:
+    """Samples start:end of the audio with only the `keep` ranges left in.
+
+    A single range comes back as a view; only the requested stretch is copied.
+    """
+    if keep is None:
+        return audio[start:end]
+    parts = []
+    offset = 0
+    for range_start, range_end in keep:
+        length = range_end - range_start
+        if offset < end and offset + length > start:
+            parts.append(audio[range_start + max(0, start - offset):
+                               range_start + min(length, end - offset)])
+        offset += length
+        if offset >= end:
+            break
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate(parts) if parts else audio[:0]
+
+
+def spliced_length(audio: np.ndarray, keep: Optional[List[Tuple[int, int]]]) -> int:
+    return len(audio) if keep is None else sum(end - start for start, end in keep)
+
+
+def plan_chunks(audio: np.ndarray, sample_rate: int, chunk_seconds: float,
+                overlap_seconds: float, search_seconds: float = 3.0,
+                keep: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, int]]:
+    """Split audio into overlapping (start, end) ranges cut at the quietest moment.
+
+    Each cut is placed at the lowest-energy 20 ms frame in the last
+    `search_seconds` before the nominal chunk end, and neighbouring chunks
+    share `overlap_seconds` of audio centred on the cut. With `keep`
+    (ranges from VAD) the positions are in the spliced audio, see `splice`.
+    """
+    total = spliced_length(audio, keep)
+    chunk = int(chunk_seconds * sample_rate)
+    half_overlap = int(overlap_seconds * sample_rate / 2)
+    search = int(search_seconds * sample_rate)
+    frame = sample_rate // 50
+    if total <= chunk:
+        return [(0, total)]
+
+    n_frames = total // frame
+    energy = np.empty(n_frames, dtype=np.float32)
+    block = BLOCK_SAMPLES // frame * frame
+    for block_start in range(0, n_frames * frame, block):
+        samples = splice(audio, keep, block_start, min(block_start + block, n_frames * frame))
+        if samples.ndim > 1:
+            samples = samples.reshape(len(samples), -1)[:, 0]
+        first = block_start // frame
+        energy[first:first + len(samples) // frame] = np.mean(
+            np.square(samples.reshape(-1, frame), dtype=np.float32), axis=1)
+
+    ranges = []
+    start = 0
+    while total - start > chunk:
+        nominal = start + chunk
+        first = max(start + chunk // 2, nominal - search) // frame
+        last = min(nominal // frame, n_frames)
+        if last > first:
+            cut = (first + int(np.argmin(energy[first:last]))) * frame + frame // 2
+        else:
+            cut = nominal
+        ranges.append((start, min(total, cut + half_overlap)))
+        start = max(0, cut - half_overlap)
+    ranges.append((start, total))
+    return ranges
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 20, min_match: int = 2) -> str:
+    """Join chunk transcripts, dropping words repeated across an overlap.
+
+    The tail of the text so far and the head of the next chunk are aligned
+    with their longest common run of words; the duplicate run is kept once
+    and anything after it in the tail (often a clipped word) is discarded.
+    """
+    words: List[str] = []
+    for text in texts:
+        following = text.split()
+        if not words or not following:
+            words.extend(following)
+            continue
+
+        tail_start = max(0, len(words) - max_overlap_words)
+        tail = [_normalize(w) for w in words[tail_start:]]
+        head = [_normalize(w) for w in following[:max_overlap_words]]
+        match = SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(
+            0, len(tail), 0, len(head))
+        if match.size >= min_match:
+            del words[tail_start + match.a + match.size:]
+            following = following[match.b + match.size:]
+        words.extend(following)
+    return " ".join(words)
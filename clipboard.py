@@ -0,0 +1,150 @@
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import time
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClipboardBackend:
+    """Reads and writes the system clipboard as text"""
+    name = "base"
+    shared = True  # other apps see what is written, so a paste keystroke pastes it
+
+    def read(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def write(self, text: str):
+        raise NotImplementedError
+
+    def wait_until_ready(self, text: str, timeout: float = 0.5) -> bool:
+        """Block until a read returns `text`, polling with a short backoff.
+
+        Replaces a fixed sleep before pasting: most backends are ready as
+        soon as `write` returns, so this usually costs one read.
+        """
+        deadline = time.perf_counter() + timeout
+        delay = 0.001
+        while True:
+            if self.read() == text:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.02)
+
+
+class MacPasteboard(ClipboardBackend):
+    """NSPasteboard in-process; no subprocess per dictation"""
+    name = "native"
+
+    def __init__(self):
+        import AppKit
+
+        self.pasteboard = AppKit.NSPasteboard.generalPasteboard()
+        self.string_type = AppKit.NSPasteboardTypeString
+        self.written_count = None
+
+    def read(self) -> Optional[str]:
+        text = self.pasteboard.stringForType_(self.string_type)
+        return None if text is None else str(text)
+
+    def write(self, text: str):
+        self.pasteboard.clearContents()
+        self.pasteboard.setString_forType_(text, self.string_type)
+        self.written_count = self.pasteboard.changeCount()
+
+    def wait_until_ready(self, text: str, timeout: float = 0.5) -> bool:
+        # The write is synchronous; the change count confirms nobody replaced it since
+        if self.pasteboard.changeCount() == self.written_count:
+            return True
+        return super().wait_until_ready(text, timeout)
+
+
+class CommandClipboard(ClipboardBackend):
+    """Clipboard tools run as subprocesses (pbcopy, wl-copy, xclip, xsel)"""
+    def __init__(self, name: str, copy_command: list, paste_command: list):
+        self.name = name
+        self.copy_command = copy_command
+        self.paste_command = paste_command
+
+    def read(self) -> Optional[str]:
+        try:
+            result = subprocess.run(self.paste_command, capture_output=True, timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout.decode('utf-8', errors='replace') if result.returncode == 0 else None
+
+    def write(self, text: str):
+        # xclip and wl-copy fork a process that serves the selection; don't wait on its output
+        subprocess.run(self.copy_command, input=text.encode('utf-8'), check=True, timeout=2,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class MemoryClipboard(ClipboardBackend):
+    """Clipboard that lives in this process only, for headless runs and benchmarks"""
+    name = "memory"
+    shared = False
+
+    def __init__(self):
+        self.text: Optional[str] = None
+
+    def read(self) -> Optional[str]:
+        return self.text
+
+    def write(self, text: str):
+        self.text = text
+
+
+COMMANDS = {
+    "pbcopy": (["pbcopy"], ["pbpaste"]),
+    "wl-copy": (["wl-copy"], ["wl-paste", "--no-newline"]),
+    "xclip": (["xclip", "-selection", "clipboard"], ["xclip", "-selection", "clipboard", "-o"]),
+    "xsel": (["xsel", "--clipboard", "--input"], ["xsel", "--clipboard", "--output"]),
+}
+
+
+def _command_backend(name: str) -> Optional[CommandClipboard]:
+    copy_command, paste_command = COMMANDS[name]
+    if shutil.which(copy_command[0]) is None:
+        return None
+    return CommandClipboard(name, copy_command, paste_command)
+
+
+def create_clipboard(name: str = "auto") -> ClipboardBackend:
+    """Pick a clipboard backend by name, or the fastest available one for "auto"
+
+    auto prefers the in-process pasteboard on macOS (falling back to pbcopy)
+    and wl-copy, xclip or xsel on Linux, depending on the session.
+    """
+    if name == "memory":
+        return MemoryClipboard()
+    if name == "native" or (name == "auto" and sys.platform == "darwin"):
+        try:
+            return MacPasteboard()
+        except ImportError:
+            if name == "native":
+                raise
+            logger.warning("PyObjC not available, using pbcopy")
+            name = "pbcopy"
+    if name in COMMANDS:
+        backend = _command_backend(name)
+        if backend is None:
+            raise ValueError(f"Clipboard tool '{COMMANDS[name][0][0]}' not found")
+        return backend
+    if name != "auto":
+        raise ValueError(f"Unknown clipboard backend '{name}'")
+
+    candidates = ["xclip", "xsel"]
+    if os.environ.get("WAYLAND_DISPLAY"):
+        candidates.insert(0, "wl-copy")
+    for candidate in candidates:
+        backend = _command_backend(candidate)
+        if backend is not None:
+            return backend
+    logger.warning("No clipboard tool found, text is only kept in memory and typed instead of pasted")
+    return MemoryClipboard()
@@ -12,12 +12,81 @@ class Config:
         """Load configuration from file or use defaults"""
         defaults = {
             "groq_api_key": os.getenv("GROQ_API_KEY", ""),
-            "model": "whisper-large-v3-turbo",
+            "api_base_url": "https://api.groq.com/openai/v1",
+            "model": "whisper-large-v3-turbo",  # or "local:<name>" for offline faster-whisper
+            "local_threads": 0,  # 0 uses every core
+            "local_compute_type": "int8",
+            "local_beam_size": 1,
             "language": "en",
             "hotkey": "cmd_r",  # Right Command for macOS
-            "auto_paste": True,
-            "audio_device": None,  # Use default
-            "sample_rate": 16000
+            "auto_paste": True,  # False only copies the transcript
+            "clipboard_backend": "auto",  # auto, native, pbcopy, wl-copy, xclip, xsel or memory
+            "restore_clipboard": False,  # Put the previous clipboard back after pasting
+            "clipboard_restore_delay": 0.5,
+            "audio_device": None,  # Input device index or name substring; None for the default
+            "sample_rate": 16000,  # Rate sent for transcription
+            # Capture at the device's own rate and resample in-process
+            "capture_native_rate": True,
+            "audio_blocksize": 0,  # Frames per callback; 0 lets PortAudio choose
+            "audio_latency": "low",  # "low", "high" or seconds
+            # Keep the microphone open while idle for instant starts; recordings
+            # then include the last preroll_seconds before the hotkey
+            "warm_stream": False,
+            "preroll_seconds": 0.3,
+            "max_recording_seconds": 1800,  # Capture buffer size; audio beyond it is dropped
+            # Long recordings move to a memory-mapped spool file, recovered after a crash
+            "spool_after_seconds": 300,  # None keeps everything in memory
+            "spool_max_seconds": 4 * 3600,
+            "spool_dir": "~/.dictation_spool",
+            # wav, flac, opus, or auto to pick whichever currently uploads fastest
+            "audio_format": "auto",
+            "encoding_min_sample_rate": 16000,  # auto may downsample to this, e.g. 8000
+            "encoding_min_bitrate": 16000,  # lowest Opus bitrate auto may pick
+            # Streaming mode: upload segments at natural pauses while recording
+            "streaming": False,
+            "segment_min_seconds": 4.0,
+            "segment_pause_seconds": 0.5,
+            "silence_threshold": 0.01,
+            # Extra backends raced against the primary one, e.g.
+            # {"type": "openai", "base_url": "...", "api_key": "...", "model": "..."}
+            # or {"type": "local", "model": "small.en"}
+            "backends": [],
+            "request_timeout": 30.0,
+            "hedge_requests": True,  # Duplicate a request once it passes the backend's p95
+            "hedge_delay_seconds": 2.0,  # Hedge delay until latencies have been measured
+            "hedge_max_requests": 2,
+            # Also duplicate to the only remote backend; each duplicate is billed
+            # (at least 10 s of audio on Groq) and counts against rate limits
+            "hedge_same_backend": False,
+            "race_backends": False,  # Start every backend at once instead of hedging
+            # Client-side rate limiting, shared by every request to the same account;
+            # defaults are Groq's free tier, response headers refine them
+            "rate_limiter": True,
+            "rate_limit_requests_per_minute": 20,
+            "rate_limit_audio_seconds_per_hour": 7200,
+            "rate_limit_max_concurrency": 8,
+            "rate_limit_max_retries": 5,
+            # Transcription queue: concurrent uploads and recordings waiting their turn
+            "max_concurrent_uploads": 2,
+            "max_queued_jobs": 4,
+            # Recordings longer than the threshold are split and transcribed in parallel
+            "chunk_threshold_seconds": 60,
+            "chunk_seconds": 30,
+            "chunk_overlap_seconds": 2.0,
+            "max_chunk_concurrency": 4,
+            # Unix socket of the headless daemon (main.py --daemon)
+            "control_socket": "~/.dictation.sock",
+            # Custom vocabulary applied to every transcript (see vocabulary.py for the format)
+            "vocabulary_file": None,  # e.g. "~/.dictation_vocabulary.txt"
+            "cache_dir": "~/.dictation_cache",  # compiled vocabulary
+            # Diagnostics reports (kill -USR1 / -USR2, or daemon.py report / profile)
+            "report_dir": "~/.dictation_reports",
+            "profile_interval": 0.005,  # Seconds between profiler samples
+            # Latency histograms are exported to <metrics_path>.json and .prom
+            "metrics_path": "/tmp/dictation_metrics",
+            # Trim silence before upload; aggressiveness 0 (gentle) to 3 (strict)
+            "vad_enabled": True,
+            "vad_aggressiveness": 2
         }
         
         if self.config_file.exists():
@@ -29,20 +98,13 @@ class Config:
                 print(f"Error loading config: {e}, using defaults")
         
         # Set attributes
+        self._keys = list(defaults)
         for key, value in defaults.items():
             setattr(self, key, value)
     
     def save_config(self):
         """Save current configuration to file"""
-        config = {
-            "groq_api_key": self.groq_api_key,
-            "model": self.model,
-            "language": self.language,
-            "hotkey": self.hotkey,
-            "auto_paste": self.auto_paste,
-            "audio_device": self.audio_device,
-            "sample_rate": self.sample_rate
-        }
+        config = {key: getattr(self, key) for key in self._keys}
         
         try:
             with open(self.config_file, 'w') as f:
@@ -57,4 +119,4 @@ class Config:
     
     def is_configured(self) -> bool:
         """Check if minimum configuration is present"""
-        return bool(self.groq_api_key)
\ No newline at end of file
+        return bool(self.groq_api_key) or self.model.startswith("local:")
\ No newline at end of file
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Headless dictation daemon with a JSON-lines control API on a Unix socket
+
+Each request is one JSON object per line, each response likewise:
+
+    {"cmd": "start"}                        -> {"ok": true}
+    {"cmd": "stop", "wait": true}           -> {"ok": true, "text": "..."}
+    {"cmd": "cancel"}                       -> {"ok": true, "cancelled": 1}
+    {"cmd": "transcribe", "path": "a.wav"}  -> {"ok": true, "text": "..."}
+    {"cmd": "status"}                       -> {"ok": true, "recording": false, ...}
+    {"cmd": "report"}                       -> {"ok": true, "path": "..."}
+    {"cmd": "profile", "action": "start"}   -> {"ok": true, "profiling": true}
+    {"cmd": "profile", "action": "stop"}    -> {"ok": true, "profiling": false, "path": "..."}
+    {"cmd": "shutdown"}                     -> {"ok": true}
+
+Errors come back as {"ok": false, "error": "..."}. Run the daemon with
+`python3 main.py --daemon`, and drive it with `python3 daemon.py <command>`.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+from metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves the control API for one headless DictationApp"""
+    daemon_threads = True
+
+    def __init__(self, app, path: Path):
+        self.app = app
+        self.path = path
+        # Recording commands from different clients must not interleave
+        self.lock = threading.Lock()
+        if path.exists():
+            if _is_listening(path):
+                raise RuntimeError(f"Another daemon is already listening on {path}")
+            path.unlink()
+        # The socket is created owner-only; a chmod after bind() would leave
+        # a window in which other local users could connect
+        previous = os.umask(0o077)
+        try:
+            super().__init__(str(path), ControlHandler)
+        finally:
+            os.umask(previous)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def handle_command(self, request: dict) -> dict:
+        command = request.get("cmd")
+        handler = getattr(self, f"_cmd_{command}", None)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command '{command}'"}
+        try:
+            return {"ok": True, **(handler(request) or {})}
+        except Exception as e:
+            logger.error(f"Command {command} failed: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def _cmd_ping(self, request):
+        return None
+
+    def _cmd_status(self, request):
+        app = self.app
+        return {
+            "recording": app.is_recording,
+            "queued": app.scheduler.depth,
+            "ready": app.transcriber.future.done(),
+            "metrics": METRICS.snapshot(),
+            "audio_callback": app.recorder.callback_stats.snapshot(),
+            "profiling": app.diagnostics.profiler is not None,
+        }
+
+    def _cmd_start(self, request):
+        with self.lock:
+            if not self.app.start_recording():
+                error = self.app.recorder.start_error
+                raise RuntimeError(f"Cannot start recording: {error}" if error
+                                   else "Transcription queue is full")
+
+    def _cmd_stop(self, request):
+        with self.lock:
+            job = self.app.stop_recording()
+        if job is None:
+            return {"text": ""}
+        if not request.get("wait", True):
+            return {"job": job.seq}
+        if not job.finished.wait(request.get("timeout", self.app.config.request_timeout * 4)):
+            raise TimeoutError("Transcription did not finish in time")
+        return {"text": job.text, "failed": job.failed, "cancelled": job.cancelled}
+
+    def _cmd_cancel(self, request):
+        with self.lock:
+            if self.app.is_recording:
+                self.app.cancel_recording()
+                return {"cancelled": 1}
+            return {"cancelled": self.app.cancel_queued()}
+
+    def _cmd_transcribe(self, request):
+        from audio_codec import read_audio_file
+        from audio_device import PolyphaseResampler
+
+        audio, sample_rate = read_audio_file(Path(request["path"]).expanduser())
+        target_rate = self.app.recorder.sample_rate
+        if sample_rate != target_rate:
+            audio = PolyphaseResampler(sample_rate, target_rate).resample(audio)
+        # Shares the upload slots with recordings
+        app = self.app
+        future = app.worker.submit(app.scheduler.limited(app.transcriber.transcribe, audio, target_rate))
+        return {"text": future.result(timeout=request.get("timeout"))}
+
+    def _cmd_report(self, request):
+        return {"path": str(self.app.diagnostics.write_report())}
+
+    def _cmd_profile(self, request):
+        """Start or stop a profiling session; without an action, toggle it"""
+        diagnostics = self.app.diagnostics
+        action = request.get("action") or ("stop" if diagnostics.profiler is not None else "start")
+        if action == "start":
+            if not diagnostics.start_profiling():
+                raise RuntimeError("Already profiling")
+            return {"profiling": True}
+        if action == "stop":
+            path = diagnostics.stop_profiling()
+            if path is None:
+                raise RuntimeError("Not profiling")
+            return {"profiling": False, "path": str(path)}
+        raise ValueError(f"Unknown profile action '{action}'")
+
+    def _cmd_shutdown(self, request):
+        threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                response = {"ok": False, "error": f"Bad request: {e}"}
+            else:
+                response = self.server.handle_command(request)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+def _is_listening(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+            return True
+        except OSError:
+            return False
+
+
+def run_daemon(socket_path: Optional[str] = None):
+    """Start a headless app and serve the control API until shut down"""
+    from dictation import DictationApp
+
+    app = DictationApp(headless=True)
+    path = Path(socket_path or app.config.control_socket).expanduser()
+    server = ControlServer(app, path)
+    app.diagnostics.install_signal_handlers()
+    app.start()
+    logger.info(f"Dictation daemon listening on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        app.shutdown()
+
+
+def send_command(path: Path, request: dict, timeout: Optional[float] = None) -> dict:
+    """Send one request to a running daemon and return its response"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(path))
+        sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        with sock.makefile('rb') as reader:
+            return json.loads(reader.readline())
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Control a running dictation daemon")
+    parser.add_argument("command", choices=["start", "stop", "cancel", "transcribe", "status",
+                                            "report", "profile", "ping", "shutdown"])
+    parser.add_argument("path", nargs="?", help="audio file for transcribe; start or stop for profile")
+    parser.add_argument("--socket", help="control socket (default: Config.control_socket)")
+    parser.add_argument("--no-wait", action="store_true", help="stop without waiting for the text")
+    args = parser.parse_args()
+
+    request = {"cmd": args.command}
+    if args.command == "transcribe":
+        if not args.path:
+            parser.error("transcribe needs an audio file")
+        request["path"] = str(Path(args.path).resolve())
+    if args.command == "stop":
+        request["wait"] = not args.no_wait
+    if args.command == "profile" and args.path:
+        request["action"] = args.path
+
+    path = Path(args.socket or Config().control_socket).expanduser()
+    try:
+        response = send_command(path, request)
+    except OSError as e:
+        print(f"Cannot reach the daemon at {path}: {e}", file=sys.stderr)
+        sys.exit(2)
+    if not response.get("ok"):
+        print(response.get("error"), file=sys.stderr)
+        sys.exit(1)
+    if "text" in response:
+        print(response["text"])
+    elif "path" in response:
+        print(response["path"])
+    elif args.command == "profile":
+        print("Profiling started")
+    elif args.command == "status":
+        print(json.dumps(response, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,167 +1,540 @@
 import asyncio
+import concurrent.futures
 import logging
 import threading
-import time
 import os
-import subprocess
+import time
+import sys
+from pathlib import Path
 from threading import Event
-from typing import Optional
+from typing import Callable, Optional, Tuple
 
 import numpy as np
-import sounddevice as sd
-import openai
-from pynput import keyboard
 
+from audio_buffer import SPOOL_SUFFIX, AudioArena, AudioSpool, PrerollBuffer, find_spools
+from audio_device import CallbackStats, PolyphaseResampler, resolve_input_device
+from clipboard import create_clipboard
 from config import Config
+from hotkeys import (CANCEL, CANCEL_QUEUED, ESCAPE, HOTKEY, START, STOP, HotkeyController,
+                     HotkeyStateMachine)
+from metrics import METRICS
+from profiling import Diagnostics
+from transcribers import DeferredTranscriber, Transcriber, TranscriptionError, create_transcriber
+from vocabulary import get_vocabulary
 
 
 logger = logging.getLogger(__name__)
 
 class AudioRecorder:
-    def __init__(self):
-        self.sample_rate = 16000
+    def __init__(self, config: Config):
+        self.config = config
+        self.sample_rate = int(config.sample_rate)  # rate of the captured audio handed on
         self.channels = 1
-        self.dtype = np.float32
+        self.dtype = np.int16
         self.recording = False
-        self.audio_data = []
+        self.arena: Optional[AudioArena] = None
         self.stream = None
+        self.resampler: Optional[PolyphaseResampler] = None
+        self.capture_rate = self.sample_rate
+        self.start_error: Optional[str] = None  # why the last start_recording failed
+        # Counted rather than logged: logging from the PortAudio thread can itself cause overruns
+        self.callback_stats = CallbackStats()
+        self._overflows_at_start = 0
+        
+        # Warm mode: the stream stays open and idle audio goes to the pre-roll
+        self.warm = False
+        self.preroll: Optional[PrerollBuffer] = None
+        self._callback_lock = threading.Lock()
+        # Held while a stream is opened or closed, so the loader thread and the
+        # hotkey thread never run two streams into the same arena
+        self._stream_lock = threading.Lock()
+        
+        # Streaming mode: called with a view of each finished segment.
+        # Runs on the PortAudio thread, so it must not block.
+        self.on_segment: Optional[Callable[[np.ndarray], None]] = None
+        self._segment_start = 0
+        self._silent_frames = 0
+        
+        # Creates the spool file once a recording is halfway to spilling
+        self._spool_timer: Optional[threading.Timer] = None
         
-    def start_recording(self):
+    def open_warm_stream(self):
+        """Keep the input stream open while idle, buffering a short pre-roll.
+
+        Recording then starts without the device open cost and includes the
+        audio from just before the hotkey. If a recording has opened its own
+        stream, that stream is kept open once the recording stops.
+        """
+        with self._stream_lock:
+            if self.warm:
+                return
+            preroll = PrerollBuffer(int(self.config.preroll_seconds * self.sample_rate))
+            if self.stream is not None:
+                with self._callback_lock:
+                    self.preroll = preroll
+                    self.warm = True
+                logger.info("Warm input stream taken over from the current recording")
+                return
+            self.preroll = preroll
+            try:
+                self.stream = self._open_stream()
+                self.warm = True
+                logger.info("Warm input stream opened")
+            except Exception as e:
+                logger.error(f"Failed to open warm input stream, opening it per recording: {e}")
+                self.stream = None
+                self.preroll = None
+    
+    def close_stream(self):
+        with self._stream_lock:
+            if self.stream is not None:
+                self.stream.stop()
+                self.stream.close()
+                self.stream = None
+            self.warm = False
+    
+    def _open_stream(self):
+        """Open the configured device, at its native rate unless disabled"""
+        import sounddevice as sd
+        
+        device, name, native_rate = resolve_input_device(sd, self.config.audio_device)
+        capture_rate = native_rate if self.config.capture_native_rate else self.sample_rate
+        self.capture_rate = capture_rate
+        self.resampler = None
+        if capture_rate != self.sample_rate:
+            self.resampler = PolyphaseResampler(capture_rate, self.sample_rate)
+        stream = sd.InputStream(
+            callback=self._audio_callback,
+            device=device,
+            channels=self.channels,
+            samplerate=capture_rate,
+            blocksize=self.config.audio_blocksize,
+            latency=self.config.audio_latency,
+            dtype=self.dtype
+        )
+        stream.start()
+        logger.info(f"Capturing from {name} at {capture_rate} Hz")
+        return stream
+    
+    def _audio_callback(self, indata, frames, time_info, status):
+        started = time.perf_counter()
+        if self.resampler is not None:
+            indata = self.resampler.process(indata)
+        # Uncontended except for the instant recording starts or stops
+        with self._callback_lock:
+            if self.recording:
+                self.arena.write(indata)
+                if self.on_segment is not None:
+                    self._detect_pause(indata, len(indata))
+            elif self.preroll is not None:
+                self.preroll.write(indata)
+        self.callback_stats.record(status, frames, self.capture_rate, time.perf_counter() - started)
+    
+    def start_recording(self) -> bool:
+        """Start capturing; False (with the reason in `start_error`) if the stream failed to open"""
+        with self._stream_lock:
+            return self._start_recording()
+    
+    def _start_recording(self) -> bool:
         if self.recording:
-            return
+            return True
+        self.start_error = None
             
-        self.recording = True
-        self.audio_data = []
+        # A fresh arena per recording, so views handed out for earlier
+        # recordings stay valid while they are still being transcribed
+        capacity = int(self.config.max_recording_seconds * self.sample_rate)
+        if self.config.spool_after_seconds:
+            spill_after = int(self.config.spool_after_seconds * self.sample_rate)
+            arena = AudioArena(capacity, spill_after_frames=spill_after)
+            # Most dictations are short: only create the spool file for
+            # recordings that get close to needing it, and off this thread
+            self._spool_timer = threading.Timer(self.config.spool_after_seconds / 2,
+                                                self._attach_spool, args=(arena,))
+            self._spool_timer.daemon = True
+            self._spool_timer.start()
+        else:
+            arena = AudioArena(capacity)
+        self._segment_start = 0
+        self._silent_frames = 0
+        self._overflows_at_start = self.callback_stats.input_overflows
         
-        def audio_callback(indata, frames, time, status):
-            if status:
-                logger.warning(f"Audio callback status: {status}")
-            if self.recording:
-                self.audio_data.append(indata.copy())
+        if self.warm:
+            # The stream is already running: seed the arena with the pre-roll
+            # and switch the callback over to it
+            with self._callback_lock:
+                arena.write(self.preroll.latest())
+                self.preroll.clear()
+                self.arena = arena
+                self.recording = True
+            logger.info("Recording started")
+            return True
         
+        self.arena = arena
+        self.recording = True
         try:
-            self.stream = sd.InputStream(
-                callback=audio_callback,
-                channels=self.channels,
-                samplerate=self.sample_rate,
-                dtype=self.dtype
-            )
-            self.stream.start()
+            with METRICS.span("stream_open"):
+                self.stream = self._open_stream()
             logger.info("Recording started")
         except Exception as e:
             logger.error(f"Failed to start recording: {e}")
+            self.start_error = str(e)
             self.recording = False
+            self._cancel_spool_timer()
+        return self.recording
+    
+    def _attach_spool(self, arena: AudioArena):
+        spool = self._create_spool()
+        if spool is not None:
+            arena.attach_spool(spool)
+    
+    def _cancel_spool_timer(self):
+        if self._spool_timer is not None:
+            # Wait for a spool being created right now, so it is discarded with the arena
+            self._spool_timer.cancel()
+            self._spool_timer.join()
+            self._spool_timer = None
+    
+    def _create_spool(self) -> Optional[AudioSpool]:
+        """Spool file for a long recording, or None if it cannot be created"""
+        spool_dir = Path(self.config.spool_dir).expanduser()
+        path = spool_dir / f"{int(time.time() * 1000)}-{os.getpid()}{SPOOL_SUFFIX}"
+        try:
+            capacity = int(self.config.spool_max_seconds * self.sample_rate)
+            return AudioSpool.create(path, capacity, self.sample_rate)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cannot create spool file, recording in memory only: {e}")
+            return None
+    
+    def _detect_pause(self, indata, frames):
+        """Cut a segment once enough audio is followed by a long enough pause"""
+        rms = float(np.sqrt(np.mean(np.square(indata, dtype=np.float32)))) / 32768
+        if rms < self.config.silence_threshold:
+            self._silent_frames += frames
+        else:
+            self._silent_frames = 0
+        
+        segment_frames = self.arena.frames - self._segment_start
+        min_frames = self.config.segment_min_seconds * self.sample_rate
+        pause_frames = self.config.segment_pause_seconds * self.sample_rate
+        if segment_frames >= min_frames and self._silent_frames >= pause_frames:
+            self._emit_segment()
+    
+    def _emit_segment(self):
+        start, end = self._segment_start, self.arena.frames
+        self._segment_start = end
+        self._silent_frames = 0
+        on_segment = self.on_segment
+        if end > start and on_segment is not None:
+            on_segment(self.arena.view(start, end))
     
     def stop_recording(self) -> Optional[np.ndarray]:
         if not self.recording:
             return None
+        
+        self._cancel_spool_timer()
             
-        self.recording = False
+        with METRICS.span("stop_recording"), self._stream_lock:
+            if self.warm:
+                # Once the lock is released the callback is back on the pre-roll
+                with self._callback_lock:
+                    self.recording = False
+            else:
+                self.recording = False
+                if self.stream:
+                    self.stream.stop()
+                    self.stream.close()
+                self.stream = None
+        
+        # Hand the final, still pending segment to the streaming consumer
+        if self.on_segment is not None:
+            self._emit_segment()
+            self.on_segment = None
         
-        if self.stream:
-            self.stream.stop()
-            self.stream.close()
-            self.stream = None
+        overflows = self.callback_stats.input_overflows - self._overflows_at_start
+        if overflows:
+            logger.warning(f"Audio input overflowed {overflows} times during the recording")
+        if self.arena.spilled:
+            logger.info(f"Recording was spilled to {self.arena.spool.path}")
+        if self.arena.dropped:
+            logger.warning(f"Recording hit max_recording_seconds, dropped {self.arena.dropped} samples")
         
-        if self.audio_data:
-            audio = np.concatenate(self.audio_data, axis=0)
+        if self.arena.frames:
+            audio = self.arena.view()
             logger.info(f"Recording stopped, captured {len(audio)} samples")
             return audio
         
+        self.arena.discard()
         return None
 
-class GroqTranscriber:
-    def __init__(self, config: Config):
-        self.config = config
-        self.client = openai.OpenAI(
-            api_key=config.groq_api_key,
-            base_url="https://api.groq.com/openai/v1"
-        )
+class TranscriptionWorker:
+    """Long-lived thread owning the one event loop used for all transcription"""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="transcription", daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the worker loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+class TranscriptionJob:
+    """One finished recording waiting to be transcribed and pasted"""
+    def __init__(self, seq: int, audio: Optional[np.ndarray], arena: AudioArena,
+                 pipeline: Optional["SegmentPipeline"] = None):
+        self.seq = seq
+        self.submitted_at = time.perf_counter()
+        self.audio = audio
+        self.arena = arena
+        self.pipeline = pipeline
+        self.started = False
+        self.cancelled = False
+        self.done = False
+        self.failed = False
+        self.text = ""
+        self.finished = Event()  # set once the job is delivered or dropped
+
+class TranscriptionScheduler:
+    """Bounded job queue: limited concurrent uploads, pastes in recording order"""
+    def __init__(self, worker: TranscriptionWorker, transcriber: Transcriber, sample_rate: int,
+                 deliver: Callable[[str], None], on_change: Callable[[], None],
+                 on_error: Callable[[], None], on_delivered: Optional[Callable[[], None]] = None,
+                 max_concurrent: int = 2, max_pending: int = 4):
+        self.worker = worker
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.deliver = deliver
+        self.on_change = on_change
+        self.on_error = on_error
+        self.on_delivered = on_delivered
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.jobs = {}  # seq -> TranscriptionJob, in recording order
+        self.next_seq = 0
+        self._lock = threading.Lock()
+        # Created on the worker loop, see _primitives()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._deliver_lock: Optional[asyncio.Lock] = None
     
-    async def transcribe(self, audio_data: np.ndarray) -> str:
+    @property
+    def depth(self) -> int:
+        with self._lock:
+            return len(self.jobs)
+    
+    def is_full(self) -> bool:
+        return self.depth >= self.max_pending
+    
+    def submit(self, audio: Optional[np.ndarray], arena: AudioArena,
+               pipeline: Optional["SegmentPipeline"] = None) -> TranscriptionJob:
+        """Queue a recording; safe to call from any thread"""
+        with self._lock:
+            job = TranscriptionJob(self.next_seq, audio, arena, pipeline)
+            self.jobs[job.seq] = job
+            self.next_seq += 1
+        self.on_change()
+        self.worker.submit(self._run(job))
+        return job
+    
+    def cancel_pending(self) -> int:
+        """Cancel jobs whose upload has not started yet"""
+        cancelled = 0
+        with self._lock:
+            for job in self.jobs.values():
+                if not job.started and not job.cancelled:
+                    job.cancelled = True
+                    if job.pipeline is not None:
+                        job.pipeline.cancel()
+                    cancelled += 1
+        if cancelled:
+            logger.warning(f"Discarded {cancelled} queued recording(s) that had not been uploaded yet")
+        return cancelled
+    
+    def _primitives(self) -> Tuple[asyncio.Semaphore, asyncio.Lock]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._deliver_lock = asyncio.Lock()
+        return self._semaphore, self._deliver_lock
+    
+    async def limited(self, fn, *args):
+        """Run fn(*args) while holding one of the upload slots"""
+        semaphore, _ = self._primitives()
+        async with semaphore:
+            return await fn(*args)
+    
+    async def _run(self, job: TranscriptionJob):
         try:
-            # Convert to int16 for saving as FLAC (as recommended by Groq)
-            audio_int16 = (audio_data * 32767).astype(np.int16)
-            
-            # Save to temporary file as FLAC for better compression
-            import tempfile
-            import subprocess
-            
-            # First save as WAV, then convert to FLAC using ffmpeg
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as wav_temp:
-                with tempfile.NamedTemporaryFile(suffix='.flac', delete=False) as flac_temp:
-                    # Save as WAV first
-                    import wave
-                    with wave.open(wav_temp.name, 'wb') as wav_file:
-                        wav_file.setnchannels(1)
-                        wav_file.setsampwidth(2)
-                        wav_file.setframerate(16000)
-                        wav_file.writeframes(audio_int16.tobytes())
-                    
-                    # Convert to FLAC using ffmpeg (if available), otherwise use WAV
-                    try:
-                        subprocess.run([
-                            'ffmpeg', '-i', wav_temp.name, '-c:a', 'flac', 
-                            '-ar', '16000', '-ac', '1', '-y', flac_temp.name
-                        ], check=True, capture_output=True)
-                        audio_file_path = flac_temp.name
-                    except (subprocess.CalledProcessError, FileNotFoundError):
-                        # Fallback to WAV if ffmpeg not available
-                        logger.warning("ffmpeg not available, using WAV format")
-                        audio_file_path = wav_temp.name
-                    
-                    # Transcribe with Groq
-                    with open(audio_file_path, 'rb') as audio_file:
-                        response = await asyncio.to_thread(
-                            self.client.audio.transcriptions.create,
-                            model=self.config.model,
-                            file=audio_file,
-                            language=self.config.language,
-                            temperature=0  # Set to 0 for consistent results as recommended
-                        )
-                    
-                    # Clean up temp files
-                    os.unlink(wav_temp.name)
-                    if audio_file_path == flac_temp.name:
-                        os.unlink(flac_temp.name)
-                    
-                    return response.text.strip()
-                
+            if job.pipeline is not None:
+                # Segments already hold their own upload slots
+                job.started = True
+                job.text = await job.pipeline.finish()
+            else:
+                semaphore, _ = self._primitives()
+                async with semaphore:
+                    METRICS.observe("queue_wait", time.perf_counter() - job.submitted_at)
+                    if not job.cancelled:
+                        job.started = True
+                        job.text = await self.transcriber.transcribe(job.audio, self.sample_rate)
+        except TranscriptionError as e:
+            # Paste whatever succeeded, but keep the recording for recovery
+            logger.error(f"Transcription error: {e}")
+            job.text = e.partial_text
+            job.failed = True
+            self.on_error()
         except Exception as e:
-            logger.error(f"Transcription failed: {e}")
-            return ""
+            logger.error(f"Transcription error: {e}")
+            job.failed = True
+            self.on_error()
+        finally:
+            job.done = True
+            await self._flush()
+    
+    async def _flush(self):
+        """Paste finished jobs, stopping at the oldest one still in flight"""
+        _, deliver_lock = self._primitives()
+        async with deliver_lock:
+            while True:
+                with self._lock:
+                    if not self.jobs:
+                        break
+                    job = next(iter(self.jobs.values()))
+                    if not job.done:
+                        break
+                if not job.cancelled:
+                    await asyncio.to_thread(self.deliver, job.text)
+                    METRICS.observe("stop_to_paste", time.perf_counter() - job.submitted_at)
+                    if self.on_delivered is not None:
+                        await asyncio.to_thread(self.on_delivered)
+                # Keep the spooled audio for recovery unless it was transcribed
+                if job.cancelled or not job.failed:
+                    job.arena.discard()
+                with self._lock:
+                    del self.jobs[job.seq]
+                job.finished.set()
+                self.on_change()
+
+class SegmentPipeline:
+    """Encodes and transcribes finished segments while recording continues"""
+    def __init__(self, scheduler: TranscriptionScheduler, transcriber: Transcriber, sample_rate: int):
+        self.scheduler = scheduler
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.futures = []
+    
+    def submit(self, audio: np.ndarray):
+        # Called from the audio callback: only hand off to the worker loop,
+        # logging included (handlers can block on I/O)
+        self.futures.append(self.scheduler.worker.submit(self._transcribe(audio)))
+    
+    async def _transcribe(self, audio: np.ndarray) -> str:
+        logger.info(f"Transcribing segment of {len(audio)} samples")
+        return await self.scheduler.limited(self.transcriber.transcribe, audio, self.sample_rate)
+    
+    async def finish(self) -> str:
+        """Wait for all segments and join their transcripts in recording order"""
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in self.futures),
+                                       return_exceptions=True)
+        text = " ".join(result for result in results if isinstance(result, str) and result)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            raise TranscriptionError(f"{len(failures)} of {len(results)} segments failed: {failures[0]}",
+                                     partial_text=text)
+        return text
+    
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
 
 class ClipboardPaster:
-    @staticmethod
-    def paste_text(text: str):
+    """Puts transcripts on the clipboard and pastes them with a synthetic Cmd+V"""
+    def __init__(self, config: Config):
+        self.config = config
+        from pynput import keyboard
+        
+        self.clipboard = create_clipboard(config.clipboard_backend)
+        self.keyboard = keyboard.Controller()
+        self.paste_modifier = keyboard.Key.cmd if sys.platform == "darwin" else keyboard.Key.ctrl
+        self._restore_timer: Optional[threading.Timer] = None
+        self._saved: Optional[str] = None
+        logger.info(f"Clipboard backend: {self.clipboard.name}")
+        if not self.clipboard.shared:
+            # Cmd+V would paste whatever the system clipboard holds instead
+            logger.warning(f"Clipboard backend {self.clipboard.name} is not the system clipboard: "
+                           + ("transcripts are typed instead of pasted" if config.auto_paste
+                              else "transcripts are not copied anywhere other apps can see"))
+    
+    def copy_text(self, text: str):
+        self.clipboard.write(text)
+    
+    def paste_text(self, text: str):
         try:
-            # Copy to clipboard
-            process = subprocess.Popen(['pbcopy'], stdin=subprocess.PIPE)
-            process.communicate(text.encode('utf-8'))
-            
-            # Simulate Cmd+V
-            time.sleep(0.1)
-            from pynput.keyboard import Key, Controller
-            kb = Controller()
-            kb.press(Key.cmd)
-            kb.press('v')
-            kb.release('v')
-            kb.release(Key.cmd)
+            with METRICS.span("paste"):
+                previous = None
+                if self.config.restore_clipboard:
+                    # Back-to-back pastes restore what was there before the first one
+                    previous = self._saved if self._restore_timer is not None else self.clipboard.read()
+                self.clipboard.write(text)
+                if not self.config.auto_paste:
+                    return
+                if not self.clipboard.shared:
+                    self.keyboard.type(text)
+                    logger.info(f"Typed text: {text[:50]}...")
+                    return
+                
+                # Paste as soon as the clipboard holds the text instead of after a fixed sleep
+                if not self.clipboard.wait_until_ready(text):
+                    logger.warning("Clipboard did not confirm the new text, pasting anyway")
+                self.keyboard.press(self.paste_modifier)
+                self.keyboard.press('v')
+                self.keyboard.release('v')
+                self.keyboard.release(self.paste_modifier)
             
+            if previous is not None:
+                self._schedule_restore(previous, text)
             logger.info(f"Pasted text: {text[:50]}...")
         except Exception as e:
             logger.error(f"Failed to paste text: {e}")
+    
+    def _schedule_restore(self, previous: str, pasted: str):
+        """Put the old clipboard back once the target app has had time to read it"""
+        if self._restore_timer is not None:
+            self._restore_timer.cancel()
+        self._saved = previous
+        
+        def restore():
+            self._restore_timer = None
+            # Leave it alone if the user copied something else meanwhile
+            if self.clipboard.read() == pasted:
+                self.clipboard.write(previous)
+        
+        self._restore_timer = threading.Timer(self.config.clipboard_restore_delay, restore)
+        self._restore_timer.daemon = True
+        self._restore_timer.start()
 
 class StatusIndicator:
-    def __init__(self, dictation_app):
+    def __init__(self, dictation_app, enabled: bool = True):
         self.dictation_app = dictation_app
         self.status_item = None
-        self._setup_status_bar()
+        self.menu = None
+        self.metrics_items = []
+        self._call_after = None
+        if enabled:
+            self._setup_status_bar()
     
     def _setup_status_bar(self):
         try:
             import Cocoa
             from Foundation import NSObject
+            from PyObjCTools import AppHelper
+            
+            # AppKit may only be touched from the main thread
+            self._call_after = AppHelper.callAfter
             
             # Initialize NSApplication if not already done
             app = Cocoa.NSApplication.sharedApplication()
@@ -175,6 +548,16 @@ class StatusIndicator:
             self.status_item.setTitle_("🎤")
             self.status_item.setHighlightMode_(True)
             
+            # Menu with recent latency numbers
+            self.menu = Cocoa.NSMenu.alloc().init()
+            self.menu.setAutoenablesItems_(False)
+            header = self.menu.addItemWithTitle_action_keyEquivalent_("Latency p50 / p95 / p99", None, "")
+            header.setEnabled_(False)
+            self.menu.addItem_(Cocoa.NSMenuItem.separatorItem())
+            self.menu.addItemWithTitle_action_keyEquivalent_("Quit", "terminate:", "q")
+            self.status_item.setMenu_(self.menu)
+            self.show_metrics(["No dictations yet"])
+            
             logger.info("Status bar initialized")
         except ImportError:
             logger.warning("PyObjC not available, status bar disabled")
@@ -183,11 +566,12 @@ class StatusIndicator:
             logger.error(f"Failed to setup status bar: {e}")
             self.status_item = None
     
-    def set_status(self, status: str):
+    def set_status(self, status: str, queue_depth: int = 0):
         status_icons = {
             "ready": "🎤",
             "recording": "🔴",
             "transcribing": "⚡",
+            "busy": "⏳",
             "error": "❌"
         }
         
@@ -195,18 +579,46 @@ class StatusIndicator:
             "ready": "Ready for dictation",
             "recording": "Recording...",
             "transcribing": "Transcribing audio...",
+            "busy": "Transcription queue is full",
             "error": "Error occurred"
         }
         
         icon = status_icons.get(status, "🎤")
         message = status_messages.get(status, status)
+        if queue_depth > 0:
+            icon = f"{icon}{queue_depth}"
+            message = f"{message} ({queue_depth} queued)"
         
         if self.status_item:
-            self.status_item.setTitle_(icon)
-            self.status_item.setToolTip_(message)
+            self._on_main_thread(self._apply_status, icon, message)
         
         logger.info(f"Status: {message}")
     
+    def _on_main_thread(self, function, *args):
+        """Run a UI update on the Cocoa main loop; callable from any thread"""
+        if self._call_after is not None and threading.current_thread() is not threading.main_thread():
+            self._call_after(function, *args)
+        else:
+            function(*args)
+    
+    def _apply_status(self, icon: str, message: str):
+        self.status_item.setTitle_(icon)
+        self.status_item.setToolTip_(message)
+    
+    def show_metrics(self, lines):
+        """Replace the latency lines in the status bar menu"""
+        if self.menu is not None:
+            self._on_main_thread(self._apply_metrics, lines)
+    
+    def _apply_metrics(self, lines):
+        for item in self.metrics_items:
+            self.menu.removeItem_(item)
+        self.metrics_items = []
+        for index, line in enumerate(lines):
+            item = self.menu.insertItemWithTitle_action_keyEquivalent_atIndex_(line, None, "", index + 1)
+            item.setEnabled_(False)
+            self.metrics_items.append(item)
+    
     def run(self):
         try:
             import Cocoa
@@ -221,115 +633,241 @@ class StatusIndicator:
                 pass
 
 class DictationApp:
-    def __init__(self):
+    """The dictation pipeline, driven by the hotkey or, when headless, by the caller.
+
+    Headless mode skips the status bar, the keyboard listener and pasting,
+    so it runs without PyObjC or a display; see daemon.py.
+    """
+    def __init__(self, headless: bool = False):
         self.config = Config()
+        self.headless = headless
         
         if not self.config.is_configured():
-            raise ValueError("Groq API key not configured. Set GROQ_API_KEY environment variable or run setup.")
+            raise ValueError("Groq API key not configured. Set GROQ_API_KEY environment variable, run setup, or use a local model.")
         
-        self.recorder = AudioRecorder()
-        self.transcriber = GroqTranscriber(self.config)
-        self.paster = ClipboardPaster()
-        self.status_indicator = StatusIndicator(self)
+        self.recorder = AudioRecorder(self.config)
+        self.worker = TranscriptionWorker()
+        # Built in the background once the app is up; see _load_in_background
+        self.transcriber = DeferredTranscriber(self.config, lambda: create_transcriber(self.config))
+        self.paster = None if headless else ClipboardPaster(self.config)
+        self.status_indicator = StatusIndicator(self, enabled=not headless)
+        self.scheduler = TranscriptionScheduler(
+            self.worker, self.transcriber, self.recorder.sample_rate,
+            deliver=self._deliver, on_change=self._refresh_status, on_error=self._show_error,
+            on_delivered=self._publish_metrics,
+            max_concurrent=self.config.max_concurrent_uploads,
+            max_pending=self.config.max_queued_jobs
+        )
         
         self.is_recording = False
+        self.pipeline: Optional[SegmentPipeline] = None
+        self.error_until = 0.0
         self.shutdown_event = Event()
         
-        # Double-press detection for stop recording
-        self.last_cmd_r_time = 0
-        self.double_press_threshold = 0.5  # 500ms window for double press
+        self.hotkeys: Optional[HotkeyController] = None
+        self.listener = None
+        if not headless:
+            self._setup_hotkeys()
+        self.diagnostics = Diagnostics(self, self.config.report_dir, self.config.profile_interval)
+    
+    def _setup_hotkeys(self):
+        from pynput import keyboard
+        
+        # Key events are only queued on the listener thread; the controller
+        # thread runs the state machine and the resulting actions
+        self.hotkeys = HotkeyController(
+            HotkeyStateMachine(double_press_seconds=0.5),
+            is_recording=lambda: self.is_recording,
+            actions={
+                START: self.start_recording,
+                STOP: lambda timestamp: self.stop_recording(),
+                CANCEL: lambda timestamp: self.cancel_recording(),
+                CANCEL_QUEUED: lambda timestamp: self.cancel_queued(),
+            }
+        )
         
         # Set up keyboard listener
+        self.hotkey_key = keyboard.Key.cmd_r  # Right Command key for macOS
+        self.escape_key = keyboard.Key.esc
         self.listener = keyboard.Listener(on_press=self.on_key_press)
     
     def on_key_press(self, key):
-        try:
-            # Right Command key for macOS
-            if key == keyboard.Key.cmd_r:
-                current_time = time.time()
-                time_since_last_press = current_time - self.last_cmd_r_time
-                
-                if not self.is_recording:
-                    # Check for double press to start recording
-                    if time_since_last_press <= self.double_press_threshold and self.last_cmd_r_time > 0:
-                        # Double press detected - start recording
-                        self.start_recording()
-                    else:
-                        # Single press - just update timestamp for potential double press
-                        self.last_cmd_r_time = current_time
-                else:
-                    # Check for double press to stop recording
-                    if time_since_last_press <= self.double_press_threshold:
-                        # Double press detected - stop recording
-                        self.stop_recording()
-                    else:
-                        # Single press while recording - update timestamp for potential double press
-                        self.last_cmd_r_time = current_time
-            # Escape key to cancel recording
-            elif key == keyboard.Key.esc and self.is_recording:
-                self.cancel_recording()
-        except AttributeError:
-            pass
-    
-    def start_recording(self):
+        # Runs on the pynput thread: timestamp, enqueue, return
+        if key == self.hotkey_key:
+            self.hotkeys.push(HOTKEY)
+        elif key == self.escape_key:
+            self.hotkeys.push(ESCAPE)
+    
+    def start_recording(self, hotkey_time: Optional[float] = None) -> bool:
+        """Start recording; False if the transcription queue is full or the audio input failed"""
         if self.is_recording:
-            return
+            return True
+        if hotkey_time is None:
+            hotkey_time = time.perf_counter()
+        
+        # Back-pressure: don't record more than the queue can take
+        if self.scheduler.is_full():
+            logger.warning("Transcription queue is full, not starting a new recording")
+            self.status_indicator.set_status("busy", self.scheduler.depth)
+            return False
             
         self.is_recording = True
-        self.status_indicator.set_status("recording")
-        self.recorder.start_recording()
+        self._refresh_status()
+        self.worker.submit(self.transcriber.warm_up())
+        if self.config.streaming:
+            self.pipeline = SegmentPipeline(self.scheduler, self.transcriber, self.recorder.sample_rate)
+            self.recorder.on_segment = self.pipeline.submit
+        if not self.recorder.start_recording():
+            self.is_recording = False
+            self.recorder.on_segment = None
+            self.pipeline = None
+            self._show_error()
+            return False
+        METRICS.observe("hotkey_to_recording", time.perf_counter() - hotkey_time)
         logger.info("Started recording")
+        return True
     
-    def stop_recording(self):
+    def stop_recording(self) -> Optional[TranscriptionJob]:
+        """Stop and queue the recording; returns its job, or None if nothing was captured"""
         if not self.is_recording:
-            return
+            return None
             
         self.is_recording = False
-        self.status_indicator.set_status("transcribing")
         
         audio_data = self.recorder.stop_recording()
-        if audio_data is not None and len(audio_data) > 0:
+        arena = self.recorder.arena
+        pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            # Only the final segment is still pending at this point
+            return self.scheduler.submit(None, arena, pipeline)
+        elif audio_data is not None and len(audio_data) > 0:
             # Process transcription in background
-            threading.Thread(target=self._process_transcription, args=(audio_data,)).start()
+            return self.scheduler.submit(audio_data, arena)
         else:
-            self.status_indicator.set_status("ready")
+            self._refresh_status()
+            return None
     
     def cancel_recording(self):
         if not self.is_recording:
             return
             
         self.is_recording = False
-        self.status_indicator.set_status("ready")
+        self._refresh_status()
         
         # Stop recording without processing audio
+        self.recorder.on_segment = None
         self.recorder.stop_recording()
+        if self.recorder.arena is not None:
+            self.recorder.arena.discard()
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+            self.pipeline = None
         logger.info("Recording cancelled")
     
-    def _process_transcription(self, audio_data):
-        try:
-            # Run async transcription in thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            text = loop.run_until_complete(self.transcriber.transcribe(audio_data))
-            loop.close()
+    def cancel_queued(self) -> int:
+        cancelled = self.scheduler.cancel_pending()
+        if cancelled:
+            self._refresh_status()
+        return cancelled
+    
+    def _refresh_status(self):
+        """Show the app state and how many transcriptions are queued"""
+        if time.time() < self.error_until:
+            return
+        depth = self.scheduler.depth
+        if self.is_recording:
+            self.status_indicator.set_status("recording", depth)
+        elif depth:
+            self.status_indicator.set_status("transcribing", depth)
+        else:
+            self.status_indicator.set_status("ready")
+    
+    def _show_error(self):
+        # Show error for 2 seconds
+        self.error_until = time.time() + 2
+        self.status_indicator.set_status("error")
+        timer = threading.Timer(2.05, self._refresh_status)
+        timer.daemon = True
+        timer.start()
+    
+    def _publish_metrics(self):
+        METRICS.export(self.config.metrics_path)
+        self.status_indicator.show_metrics(METRICS.summary_lines())
+    
+    def _deliver(self, text: str):
+        if text and self.paster is not None:
+            self.paster.paste_text(text)
+            logger.info(f"Transcribed and pasted: {text}")
+    
+    async def _recover_spools(self):
+        """Transcribe recordings spooled by a previous run that did not finish"""
+        spool_dir = Path(self.config.spool_dir).expanduser()
+        for spool in find_spools(spool_dir):
+            audio = spool.view()
+            if len(audio) == 0:
+                spool.discard()
+                continue
             
-            if text:
-                self.paster.paste_text(text)
-                logger.info(f"Transcribed and pasted: {text}")
+            seconds = len(audio) / spool.sample_rate
+            logger.info(f"Recovering {seconds:.0f}s recording from {spool.path}")
+            try:
+                text = await self.transcriber.transcribe(audio, spool.sample_rate)
+            except Exception as e:
+                logger.error(f"Failed to recover {spool.path}: {e}")
+                continue
+            if not text:
+                logger.info(f"No speech in {spool.path}, discarding it")
+                spool.discard()
+                continue
             
-        except Exception as e:
-            logger.error(f"Transcription error: {e}")
-            self.status_indicator.set_status("error")
-            time.sleep(2)  # Show error for 2 seconds
-        finally:
-            self.status_indicator.set_status("ready")
+            transcript_path = spool.save_transcript(text)
+            if self.paster is not None:
+                await asyncio.to_thread(self.paster.copy_text, text)
+            spool.discard()
+            logger.info(f"Recovered transcript saved to {transcript_path}")
     
-    def run(self):
+    def start(self, recover_spools: bool = True, on_ready: Optional[Callable[[], None]] = None):
+        """Bring up the hotkey listener and status item, then load the rest.
+
+        `on_ready` runs once the app is usable and before anything loads in
+        the background (the startup check measures there).
+        """
         self.status_indicator.set_status("ready")
-        self.listener.start()
-        
+        if self.listener is not None:
+            self.hotkeys.start()
+            self.listener.start()
+        if on_ready is not None:
+            on_ready()
+        self.loader = threading.Thread(target=self._load_in_background, name="loader", daemon=True)
+        self.loader.start()
+        if recover_spools:
+            self.worker.submit(self._recover_spools())
+    
+    def _load_in_background(self):
+        """Import the API client and PortAudio off the startup path"""
+        with METRICS.span("background_load"):
+            self.transcriber.load()
+            get_vocabulary(self.config)  # compile or load it before the first transcript
+            if self.config.warm_stream:
+                self.recorder.open_warm_stream()
+            else:
+                try:
+                    import sounddevice  # noqa: F401  (initializes PortAudio)
+                except (ImportError, OSError) as e:
+                    logger.error(f"Audio input unavailable: {e}")
+    
+    def shutdown(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.hotkeys.stop()
+        self.recorder.close_stream()
+        self.worker.submit(self.transcriber.close()).result(timeout=5)
+        self.worker.stop()
+        self.shutdown_event.set()
+    
+    def run(self):
+        self.start()
         try:
             self.status_indicator.run()
         finally:
-            self.listener.stop()
-            self.shutdown_event.set()
\ No newline at end of file
+            self.shutdown()
\ No newline at end of file
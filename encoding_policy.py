@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from audio_codec import AudioEncoder, FlacEncoder, OpusEncoder, WavEncoder
+from audio_device import PolyphaseResampler
+
+
+logger = logging.getLogger(__name__)
+
+OPUS_BITRATES = (64000, 32000, 24000, 16000, 12000)
+
+
+class EncodingOption:
+    """One way to encode an upload: an encoder and, optionally, a lower sample rate"""
+    def __init__(self, name: str, encoder: AudioEncoder, bytes_per_second: float,
+                 encode_cost: float, sample_rate: Optional[int] = None):
+        self.name = name
+        self.encoder = encoder
+        self.sample_rate = sample_rate  # None keeps the recording's rate
+        # Starting guesses, replaced by measurements as uploads are encoded
+        self.bytes_per_second = bytes_per_second
+        self.encode_cost = encode_cost  # encode seconds per second of audio
+
+    def encode(self, audio: np.ndarray, sample_rate: int) -> Tuple[str, bytes]:
+        if self.sample_rate and self.sample_rate < sample_rate:
+            audio = PolyphaseResampler(sample_rate, self.sample_rate).resample(audio)
+            sample_rate = self.sample_rate
+        return f"audio.{self.encoder.extension}", self.encoder.encode(audio, sample_rate)
+
+
+def build_options(sample_rate: int, min_sample_rate: int, min_bitrate: int) -> List[EncodingOption]:
+    """The encodings worth choosing between, limited to what is installed"""
+    options = [
+        EncodingOption("wav", WavEncoder(), 2 * sample_rate, 0.0005),
+        EncodingOption("flac", FlacEncoder(), 1.1 * sample_rate, 0.003),
+    ]
+    if min_sample_rate < sample_rate:
+        options.append(EncodingOption(f"flac@{min_sample_rate // 1000}kHz", FlacEncoder(),
+                                      1.1 * min_sample_rate, 0.005, sample_rate=min_sample_rate))
+    for bitrate in OPUS_BITRATES:
+        if bitrate >= min_bitrate:
+            # Ogg framing adds a few percent on top of the bitrate
+            options.append(EncodingOption(f"opus-{bitrate // 1000}k", OpusEncoder(bitrate),
+                                          bitrate / 8 * 1.05, 0.02))
+    return [option for option in options if option.encoder.is_available()]
+
+
+class EncodingPolicy:
+    """Picks the upload encoding with the lowest predicted encode + upload time.
+
+    Encode cost and size per second of audio are measured for each option.
+    Upload throughput is fitted to recent requests as
+    `seconds = overhead + bytes / throughput + k * audio seconds`, so the
+    server's processing time is not mistaken for a slow network. Every
+    `explore_every`-th upload uses the runner-up, which keeps the sizes
+    varied enough for that fit.
+    """
+    def __init__(self, options: List[EncodingOption], bandwidth_guess: float = 1_000_000,
+                 window: int = 20, explore_every: int = 8):
+        self.options = options
+        self.throughput = bandwidth_guess  # upload bytes per second
+        self.samples = deque(maxlen=window)  # (bytes, audio seconds, request seconds)
+        self.explore_every = explore_every
+        self.uploads = 0
+        # Encodes run on worker threads while requests finish on the event loop
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "EncodingPolicy":
+        sample_rate = int(config.sample_rate)
+        options = build_options(sample_rate, min(sample_rate, int(config.encoding_min_sample_rate)),
+                                int(config.encoding_min_bitrate))
+        return cls(options)
+
+    def predict(self, option: EncodingOption, audio_seconds: float) -> float:
+        """Expected seconds to encode and upload `audio_seconds` of audio"""
+        return audio_seconds * (option.encode_cost + option.bytes_per_second / self.throughput)
+
+    def choose(self, audio_seconds: float) -> EncodingOption:
+        with self._lock:
+            ranked = sorted(self.options, key=lambda option: self.predict(option, audio_seconds))
+            self.uploads += 1
+            if len(ranked) > 1 and self.uploads % self.explore_every == 0:
+                return ranked[1]
+            return ranked[0]
+
+    def encode(self, audio: np.ndarray, sample_rate: int) -> Tuple[str, bytes]:
+        """Encode with the currently best option and learn its cost and size.
+
+        An option whose encoder fails is dropped for good and the next best
+        one is tried, as long as any other option is left.
+        """
+        audio_seconds = len(audio) / sample_rate
+        while True:
+            option = self.choose(audio_seconds)
+            start = time.perf_counter()
+            try:
+                upload = option.encode(audio, sample_rate)
+                break
+            except Exception as e:
+                with self._lock:
+                    if option in self.options:
+                        if len(self.options) == 1:
+                            raise
+                        self.options.remove(option)
+                logger.warning(f"Encoding as {option.name} failed, no longer using it: {e}")
+        elapsed = time.perf_counter() - start
+        if audio_seconds > 0:
+            with self._lock:
+                option.encode_cost += 0.3 * (elapsed / audio_seconds - option.encode_cost)
+                option.bytes_per_second += 0.3 * (len(upload[1]) / audio_seconds - option.bytes_per_second)
+        logger.debug(f"Encoded {audio_seconds:.1f}s as {option.name}: {len(upload[1]) / 1024:.0f} KiB "
+                     f"in {elapsed * 1000:.0f} ms (upload estimate {self.throughput / 1000:.0f} kB/s)")
+        return upload
+
+    def record_request(self, size: int, audio_seconds: float, seconds: float):
+        """Feed back the duration of a successful request that uploaded `size` bytes"""
+        with self._lock:
+            self.samples.append((size, audio_seconds, seconds))
+            throughput = self._fit()
+            if throughput is not None:
+                self.throughput = throughput
+
+    def _fit(self) -> Optional[float]:
+        if len(self.samples) < 3:
+            return None
+        samples = np.array(self.samples, dtype=np.float64)
+        sizes, audio_seconds, seconds = samples.T
+        if np.ptp(sizes) < 0.2 * np.mean(sizes):
+            return None  # too little spread to tell the network from the server
+        columns = [np.ones(len(samples)), sizes]
+        # Audio length is only separable from size once different encodings were used
+        if (len(samples) >= 6 and np.ptp(audio_seconds) > 0
+                and abs(np.corrcoef(sizes, audio_seconds)[0, 1]) < 0.95):
+            columns.append(audio_seconds)
+        coefficients = np.linalg.lstsq(np.column_stack(columns), seconds, rcond=None)[0]
+        seconds_per_byte = coefficients[1]
+        if seconds_per_byte <= 0:
+            # Upload time is lost in the noise: the network is not the bottleneck
+            return 1e9
+        return float(min(1e9, max(1e3, 1.0 / seconds_per_byte)))
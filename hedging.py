@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import Config
+from metrics import METRICS
+from ratelimit import QUEUE_CLOCK, QueueClock
+from transcribers import Transcriber, TranscriptionError
+
+
+logger = logging.getLogger(__name__)
+
+# Latency is dominated by fixed costs below this clip length and grows with
+# the audio above it; latencies are kept as if every clip were this long
+REFERENCE_AUDIO_SECONDS = 10.0
+
+
+def audio_scale(audio_seconds: float) -> float:
+    return max(audio_seconds, REFERENCE_AUDIO_SECONDS) / REFERENCE_AUDIO_SECONDS
+
+
+class LatencyTracker:
+    """Recent request latencies (scaled to REFERENCE_AUDIO_SECONDS) and failures for one backend"""
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        self.failures = 0.0  # exponentially decayed failure count
+
+    def record_success(self, seconds: float, audio_seconds: float = 0.0):
+        self.latencies.append(seconds / audio_scale(audio_seconds))
+        self.failures *= 0.8
+
+    def record_failure(self):
+        self.failures = self.failures * 0.8 + 1.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return float(np.percentile(self.latencies, q))
+
+    def score(self, default: float) -> float:
+        """Expected latency used for routing; failures count as slow requests"""
+        p50 = self.percentile(50)
+        return (default if p50 is None else p50) * (1.0 + self.failures)
+
+
+class HedgedTranscriber(Transcriber):
+    """Races backends and hedges slow requests to cut tail latency.
+
+    Each chunk goes to the backend with the best recent latency. If it has
+    not answered by that backend's p95, scaled to the clip's length, a
+    duplicate request starts on the next backend (or, with
+    hedge_same_backend, the same one if it is the only remote backend). With
+    race_backends every backend starts at once. The first successful answer
+    wins, the others are cancelled, and every request has a deadline.
+    """
+    def __init__(self, config: Config, backends: List[Transcriber], names: List[str]):
+        super().__init__(config)
+        self.backends = backends
+        self.names = names
+        self.trackers: Dict[str, LatencyTracker] = {name: LatencyTracker() for name in names}
+
+    async def warm_up(self):
+        await asyncio.gather(*(backend.warm_up() for backend in self.backends))
+
+    async def close(self):
+        await asyncio.gather(*(backend.close() for backend in self.backends))
+
+    def _ranked(self) -> List[int]:
+        default = self.config.hedge_delay_seconds
+        return sorted(range(len(self.backends)),
+                      key=lambda i: self.trackers[self.names[i]].score(default))
+
+    def _hedge_delay(self, index: int, audio_seconds: float) -> float:
+        p95 = self.trackers[self.names[index]].percentile(95)
+        if p95 is None:
+            p95 = self.config.hedge_delay_seconds
+        return max(p95 * audio_scale(audio_seconds), 0.1)
+
+    async def _attempt(self, index: int, audio_data: np.ndarray, sample_rate: int,
+                       clock: QueueClock) -> str:
+        # This task's own context, so the rate limiter reports to this attempt's clock
+        QUEUE_CLOCK.set(clock)
+        name = self.names[index]
+        start = time.monotonic()
+        try:
+            text = await self.backends[index]._transcribe_chunk(audio_data, sample_rate)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.trackers[name].record_failure()
+            logger.warning(f"Backend {name} failed: {e}")
+            raise
+        now = time.monotonic()
+        elapsed = now - start - clock.queued(now)
+        self.trackers[name].record_success(elapsed, len(audio_data) / sample_rate)
+        METRICS.observe(f"backend:{name}", elapsed)
+        return text
+
+    def _plan(self) -> List[int]:
+        """Order in which attempts are launched"""
+        ranked = self._ranked()
+        if self.config.race_backends:
+            return ranked
+        plan = ranked[:self.config.hedge_max_requests]
+        # A lone remote backend is hedged against itself only on request:
+        # the duplicate is billed and rate limited like any other request
+        if (len(plan) == 1 and self.backends[plan[0]].is_remote and self.config.hedge_same_backend
+                and self.config.hedge_max_requests > 1):
+            plan = plan * 2
+        return plan
+
+    async def _request(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        # Applies the deadline itself, across hedged duplicates
+        return await self._transcribe_chunk(audio_data, sample_rate)
+
+    async def _transcribe_chunk(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        plan = self._plan()
+        audio_seconds = len(audio_data) / sample_rate
+        tasks = {}  # task -> (backend index, queue clock, launch time)
+        errors = []
+        first = None
+
+        def launch(index: int):
+            clock = QueueClock()
+            task = asyncio.ensure_future(self._attempt(index, audio_data, sample_rate, clock))
+            tasks[task] = (index, clock, time.monotonic())
+            return tasks[task]
+
+        def active(attempt, now: float) -> float:
+            # Time spent queued behind the rate limiter counts toward neither
+            # the deadline nor the hedge delay
+            _, clock, launched = attempt
+            return now - launched - clock.queued(now)
+
+        try:
+            while True:
+                # Launch everything that is due: all at once when racing,
+                # otherwise the next attempt once the current one is overdue
+                if plan and (self.config.race_backends or not tasks):
+                    while plan:
+                        attempt = launch(plan.pop(0))
+                        first = first or attempt
+                        if not self.config.race_backends:
+                            break
+
+                now = time.monotonic()
+                remaining = self.config.request_timeout - active(first, now)
+                if remaining <= 0:
+                    raise TranscriptionError(
+                        f"No backend answered within {self.config.request_timeout:.0f}s")
+                if not tasks:
+                    raise TranscriptionError(f"All backends failed: {'; '.join(errors)}")
+
+                timeout = remaining
+                newest = list(tasks.values())[-1]
+                hedging = bool(plan) and not self.config.race_backends
+                if hedging:
+                    delay = self._hedge_delay(newest[0], audio_seconds)
+                    timeout = min(remaining, max(0.0, delay - active(newest, now)))
+
+                done, _ = await asyncio.wait(tasks, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # While queued in the limiter the attempt's clock stands still
+                    if hedging and active(newest, time.monotonic()) >= delay:
+                        index = plan.pop(0)
+                        logger.info(f"Hedging request on {self.names[index]}")
+                        launch(index)
+                    continue
+
+                for task in done:
+                    index = tasks.pop(task)[0]
+                    if task.exception() is None:
+                        logger.info(f"Transcribed by {self.names[index]}")
+                        return task.result()
+                    errors.append(f"{self.names[index]}: {task.exception()}")
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,96 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+# Key events fed to the state machine
+HOTKEY = "hotkey"
+ESCAPE = "escape"
+
+# Actions it asks for
+START = "start"
+STOP = "stop"
+CANCEL = "cancel"
+CANCEL_QUEUED = "cancel_queued"
+
+
+class HotkeyStateMachine:
+    """Turns timestamped key events into recording actions.
+
+    A double press of the hotkey starts or stops recording. Escape cancels
+    the recording; when idle it takes a double press of Escape to cancel the
+    queued transcriptions, since a single Escape is common in other apps.
+    After a double press fires, the next action needs a fresh double press,
+    so a quick triple press does not start and immediately stop a recording.
+    """
+    def __init__(self, double_press_seconds: float = 0.5):
+        self.double_press_seconds = double_press_seconds
+        self.last_press: Optional[float] = None
+        self.last_escape: Optional[float] = None
+
+    def on_event(self, event: str, timestamp: float, recording: bool) -> Optional[str]:
+        if event == ESCAPE:
+            if recording:
+                self.last_escape = None
+                return CANCEL
+            if self.last_escape is not None and timestamp - self.last_escape <= self.double_press_seconds:
+                self.last_escape = None
+                return CANCEL_QUEUED
+            self.last_escape = timestamp
+            return None
+        if event != HOTKEY:
+            return None
+        if self.last_press is not None and timestamp - self.last_press <= self.double_press_seconds:
+            self.last_press = None
+            return STOP if recording else START
+        self.last_press = timestamp
+        return None
+
+
+class HotkeyController:
+    """Runs hotkey actions on a dedicated thread.
+
+    The pynput callback only timestamps the key and puts it on a SimpleQueue
+    (no Python-level locking), so key delivery never waits on stream
+    shutdown, status updates or anything else an action does. Actions run
+    one at a time in event order and receive the event's timestamp.
+    """
+    def __init__(self, machine: HotkeyStateMachine, is_recording: Callable[[], bool],
+                 actions: Dict[str, Callable[[float], None]]):
+        self.machine = machine
+        self.is_recording = is_recording
+        self.actions = actions
+        self.events = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="hotkeys", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.events.put(None)
+        self.thread.join(timeout=5)
+
+    def push(self, event: str, timestamp: Optional[float] = None):
+        """Queue a key event; safe to call from the listener thread"""
+        self.events.put((event, time.perf_counter() if timestamp is None else timestamp))
+
+    def _run(self):
+        while True:
+            item = self.events.get()
+            if item is None:
+                return
+            event, timestamp = item
+            action = self.machine.on_event(event, timestamp, self.is_recording())
+            if action is None:
+                continue
+            METRICS.observe("hotkey_dispatch", time.perf_counter() - timestamp)
+            try:
+                self.actions[action](timestamp)
+            except Exception as e:
+                logger.error(f"Hotkey action {action} failed: {e}")
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 
-import asyncio
+import time
+
+STARTED = time.perf_counter()  # before anything heavier is imported
+
+import argparse
+import json
 import logging
+import re
 import signal
+import subprocess
 import sys
 from pathlib import Path
 
-from dictation import DictationApp
+# Seconds from launch until the hotkey listener and status item are up
+STARTUP_BUDGET_SECONDS = 1.0
+# Modules that must not be imported before the app is ready
+DEFERRED_MODULES = ("openai", "httpx", "sounddevice", "soundfile", "faster_whisper")
 
 def setup_logging():
     logging.basicConfig(
@@ -22,12 +32,92 @@ def signal_handler(signum, frame):
     print("\nShutting down...")
     sys.exit(0)
 
+def startup_probe():
+    """Start the app, report startup timings as JSON on stdout and exit"""
+    logging.basicConfig(level=logging.WARNING)
+    preloaded = set(sys.modules)
+    from dictation import DictationApp
+
+    timings = {}
+
+    def on_ready():
+        # Before the loader thread starts, so its imports cannot be counted
+        timings["ready"] = time.perf_counter() - STARTED
+        timings["eager"] = [name for name in DEFERRED_MODULES
+                            if name in sys.modules and name not in preloaded]
+
+    app = DictationApp()
+    app.start(recover_spools=False, on_ready=on_ready)
+    app.loader.join()
+    timings["loaded"] = time.perf_counter() - STARTED
+    app.shutdown()
+    print(json.dumps(timings))
+
+def profile_startup(budget: float, preamble: str = "") -> int:
+    """Run a startup probe under -X importtime and print a breakdown.
+
+    Returns a non-zero exit status when the app took longer than `budget`
+    to become ready or imported a deferred module on the way.
+    """
+    code = f"{preamble}\nimport main\nmain.startup_probe()"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=Path(__file__).parent, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # "import time: self [us] | cumulative | imported package", nesting shown by indent
+    imports = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match and not match.group(3):
+            imports.append((int(match.group(2)) / 1000, match.group(4)))
+
+    print(f"Ready after {timings['ready'] * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+    print(f"Background loading done after {timings['loaded'] * 1000:.0f} ms")
+    print()
+    print(f"{'module':<30} {'import (ms)':>12}")
+    for milliseconds, name in sorted(imports, reverse=True)[:15]:
+        print(f"{name:<30} {milliseconds:>12.1f}")
+
+    status = 0
+    if timings["ready"] > budget:
+        print(f"\nFAIL: startup took longer than {budget * 1000:.0f} ms")
+        status = 1
+    if timings["eager"]:
+        print(f"\nFAIL: imported before the app was ready: {', '.join(timings['eager'])}")
+        status = 1
+    return status
+
 def main():
+    parser = argparse.ArgumentParser(description="Voice dictation for macOS")
+    parser.add_argument("--daemon", action="store_true",
+                        help="run headless and take commands on a Unix socket (see daemon.py)")
+    parser.add_argument("--socket", help="control socket for --daemon")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report an import-time breakdown of startup and exit")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS,
+                        help="startup budget in seconds for --profile-startup")
+    args = parser.parse_args()
+    if args.profile_startup:
+        sys.exit(profile_startup(args.budget))
+
     setup_logging()
     signal.signal(signal.SIGINT, signal_handler)
-    
+
+    if args.daemon:
+        from daemon import run_daemon
+
+        signal.signal(signal.SIGTERM, signal_handler)
+        run_daemon(args.socket)
+        return
+
+    from dictation import DictationApp
+
     app = DictationApp()
+    app.diagnostics.install_signal_handlers()
     app.run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages, in the order a dictation passes through them
+STAGES = (
+    "hotkey_to_recording",  # double-press detected -> audio stream running
+    "stream_open",          # creating and starting the input stream
+    "stop_recording",       # stream stop/close and handing over the audio
+    "queue_wait",           # waiting for an upload slot
+    "vad",                  # silence trimming
+    "encode",               # in-memory audio encoding
+    "request",              # upload + inference + response
+    "paste",                # clipboard write and synthetic paste
+    "stop_to_paste",        # end to end, from the stop hotkey to the paste
+)
+QUANTILES = (50, 95, 99)
+
+
+class Histogram:
+    """Rolling window of recent durations plus lifetime count and sum"""
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentiles(self) -> Dict[int, float]:
+        if not self.samples:
+            return {}
+        values = np.percentile(self.samples, QUANTILES)
+        return {q: float(v) for q, v in zip(QUANTILES, values)}
+
+
+class Metrics:
+    """Thread-safe registry of per-stage latency histograms"""
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the body of a with-block as one observation of `stage`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def _ordered(self):
+        with self._lock:
+            names = sorted(self.histograms, key=lambda n: (STAGES.index(n) if n in STAGES else len(STAGES), n))
+            return [(name, self.histograms[name]) for name in names]
+
+    def snapshot(self) -> dict:
+        snapshot = {}
+        for name, histogram in self._ordered():
+            with self._lock:
+                percentiles = histogram.percentiles()
+                count, total = histogram.count, histogram.total
+            snapshot[name] = {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                **{f"p{q}": value for q, value in percentiles.items()},
+            }
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP dictation_stage_seconds Latency of each dictation stage",
+            "# TYPE dictation_stage_seconds summary",
+        ]
+        for name, stats in self.snapshot().items():
+            for q in QUANTILES:
+                if f"p{q}" in stats:
+                    lines.append(f'dictation_stage_seconds{{stage="{name}",quantile="{q / 100}"}} '
+                                 f'{stats[f"p{q}"]:.6f}')
+            lines.append(f'dictation_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+            lines.append(f'dictation_stage_seconds_sum{{stage="{name}"}} '
+                         f'{stats["mean"] * stats["count"]:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> list:
+        """Short human-readable lines, e.g. for the status bar menu"""
+        lines = []
+        for name, stats in self.snapshot().items():
+            if "p50" in stats:
+                lines.append(f"{name}: {stats['p50'] * 1000:.0f} / {stats['p95'] * 1000:.0f} / "
+                             f"{stats['p99'] * 1000:.0f} ms (n={stats['count']})")
+        return lines
+
+    def export(self, base_path: Optional[str]):
+        """Write <base>.json and <base>.prom, replacing earlier exports atomically"""
+        if not base_path:
+            return
+        base = Path(base_path).expanduser()
+        outputs = {
+            base.with_suffix(".json"): json.dumps(self.snapshot(), indent=2),
+            base.with_suffix(".prom"): self.to_prometheus(),
+        }
+        try:
+            for path, content in outputs.items():
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_text(content)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to export metrics: {e}")
+
+
+METRICS = Metrics()
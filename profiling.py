@@ -0,0 +1,202 @@
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+# Threads PortAudio or other C code created that Python has no name for
+FOREIGN_THREAD = "native thread (e.g. PortAudio callback)"
+
+
+def thread_names() -> Dict[int, str]:
+    return {thread.ident: thread.name for thread in threading.enumerate()}
+
+
+def format_thread_stacks() -> str:
+    """The current stack of every thread that is running Python code"""
+    names = thread_names()
+    sections = []
+    for ident, frame in sys._current_frames().items():
+        name = names.get(ident, FOREIGN_THREAD)
+        sections.append(f'Thread "{name}" ({ident}):\n' + "".join(traceback.format_stack(frame)))
+    return "\n".join(sections)
+
+
+class SamplingProfiler:
+    """Samples the stacks of all threads every `interval` seconds.
+
+    cProfile only sees the thread that enabled it, while the interesting
+    work here happens on the listener, hotkey, audio callback and
+    transcription threads. Sampling sees all of them, costs one
+    sys._current_frames() per interval, and can be started and stopped
+    in a running process.
+    """
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()  # (thread name, stack from the root) -> count
+        self.ticks = 0
+        self.duration = 0.0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (f"{code.co_name} "
+                                          f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        return label
+
+    def _run(self):
+        own = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            names = thread_names()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(ident, FOREIGN_THREAD), tuple(stack))] += 1
+            self.ticks += 1
+        self.duration += time.perf_counter() - started
+
+    def summary_lines(self, top: int = 15) -> List[str]:
+        """Per thread, the functions seen most often on top of and anywhere in the stack"""
+        by_thread: Dict[str, Counter] = {}
+        for (thread, stack), count in self.samples.items():
+            by_thread.setdefault(thread, Counter())[stack] += count
+        lines = [f"{self.ticks} samples every {self.interval * 1000:.0f} ms over {self.duration:.1f}s"]
+        for thread, stacks in sorted(by_thread.items(), key=lambda item: -sum(item[1].values())):
+            total = sum(stacks.values())
+            own, inclusive = Counter(), Counter()
+            for stack, count in stacks.items():
+                if stack:
+                    own[stack[-1]] += count
+                for label in set(stack):
+                    inclusive[label] += count
+            lines.append("")
+            lines.append(f'Thread "{thread}": {total} samples')
+            lines.append(f"  {'self %':>7} {'total %':>8}  function")
+            for label, count in own.most_common(top):
+                lines.append(f"  {100 * count / total:>7.1f} {100 * inclusive[label] / total:>8.1f}  {label}")
+        return lines
+
+    def collapsed(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope"""
+        return "".join(f"{thread};{';'.join(stack)} {count}\n"
+                       for (thread, stack), count in sorted(self.samples.items()))
+
+
+class Diagnostics:
+    """On-demand reports from a running DictationApp.
+
+    A report holds the app state, audio callback counters, latency metrics,
+    the stack of every thread and, when a profiling session just ended, its
+    profile. SIGUSR1 writes a report, SIGUSR2 starts a profiling session or
+    stops it and writes a report; daemon.py offers the same over its socket.
+    """
+    def __init__(self, app, report_dir: str, interval: float = 0.005):
+        self.app = app
+        self.report_dir = Path(report_dir).expanduser()
+        self.interval = interval
+        self.created = time.monotonic()
+        self.profiler: Optional[SamplingProfiler] = None
+        self._lock = threading.Lock()
+
+    def start_profiling(self) -> bool:
+        """Start a profiling session; False if one is already running"""
+        with self._lock:
+            if self.profiler is not None:
+                return False
+            self.profiler = SamplingProfiler(self.interval)
+            self.profiler.start()
+        logger.info("Profiling started")
+        return True
+
+    def stop_profiling(self) -> Optional[Path]:
+        """End the profiling session and write its report; None if none was running"""
+        with self._lock:
+            profiler, self.profiler = self.profiler, None
+        if profiler is None:
+            return None
+        profiler.stop()
+        return self.write_report(profiler)
+
+    def toggle_profiling(self) -> Optional[Path]:
+        if self.start_profiling():
+            return None
+        return self.stop_profiling()
+
+    def write_report(self, profiler: Optional[SamplingProfiler] = None) -> Path:
+        app = self.app
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+        path = self.report_dir / f"report-{stamp}-{os.getpid()}.txt"
+
+        lines = [
+            f"Dictation report {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}, pid {os.getpid()}, "
+            f"up {time.monotonic() - self.created:.0f}s",
+            f"recording: {app.is_recording}, queued jobs: {app.scheduler.depth}, "
+            f"transcriber loaded: {app.transcriber.future.done()}",
+            "",
+            "== Audio callback ==",
+        ]
+        stats = app.recorder.callback_stats.snapshot()
+        lines += [f"{name}: {value}" for name, value in stats.items()]
+        lines += ["", "== Latency p50 / p95 / p99 =="] + METRICS.summary_lines()
+        if profiler is not None:
+            lines += ["", "== Profile =="] + profiler.summary_lines()
+            folded = path.with_suffix(".folded")
+            folded.write_text(profiler.collapsed())
+            lines.append(f"Folded stacks for a flame graph: {folded}")
+        lines += ["", "== Thread stacks ==", format_thread_stacks()]
+
+        path.write_text("\n".join(lines) + "\n")
+        logger.info(f"Diagnostics report written to {path}")
+        return path
+
+    def install_signal_handlers(self):
+        """SIGUSR1 writes a report, SIGUSR2 toggles profiling (main thread only)"""
+        def in_background(function):
+            # Keep the handler short; the report walks every thread's stack
+            return lambda *args: threading.Thread(target=function, name="diagnostics", daemon=True).start()
+
+        install = signal.signal
+        if self.app.status_indicator.status_item is not None:
+            # Python handlers only run between bytecodes, which the Cocoa run
+            # loop rarely executes; Mach signals are delivered through it
+            try:
+                from PyObjCTools import MachSignals
+                install = MachSignals.signal
+            except ImportError:
+                pass
+        install(signal.SIGUSR1, in_background(self.write_report))
+        install(signal.SIGUSR2, in_background(self.toggle_profiling))
+        logger.info(f"Diagnostics: kill -USR1 {os.getpid()} writes a report to {self.report_dir}, "
+                    f"kill -USR2 {os.getpid()} starts or stops profiling")
@@ -0,0 +1,265 @@
+import asyncio
+import contextvars
+import logging
+import random
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from metrics import METRICS
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# What Groq's x-ratelimit-*-<kind> headers describe. They only add limits on
+# top of the local per-minute estimates; other kinds are ignored.
+HEADER_WINDOWS = {
+    "requests": "requests per day",
+    "tokens": "tokens per minute",
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds in a rate-limit reset header: "7.66s", "2m59.56s", "120ms" or plain seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    """Classic token bucket; a rate of 0 means unlimited"""
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.per_second:
+            return 0.0
+        self._refill(now)
+        # Oversized requests only need a full bucket, or they would never fit
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.per_second)
+
+    def take(self, amount: float):
+        if self.per_second:
+            self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        if self.per_second:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class QueueClock:
+    """Time one request spent queued in a limiter, so deadlines can leave it out"""
+    def __init__(self):
+        self.waited = 0.0
+        self.waiting_since: Optional[float] = None
+
+    def queued(self, now: float) -> float:
+        if self.waiting_since is None:
+            return self.waited
+        return self.waited + now - self.waiting_since
+
+
+# Set by a caller (e.g. one hedged attempt) to learn how long its request queued
+QUEUE_CLOCK: contextvars.ContextVar = contextvars.ContextVar("queue_clock", default=None)
+
+
+class RateLimiter:
+    """Keeps every request to one API account within its rate limits.
+
+    Requests per minute and audio seconds per hour are always enforced
+    locally with token buckets. The x-ratelimit-remaining-* /
+    x-ratelimit-reset-* headers (see HEADER_WINDOWS) add the server's daily
+    request and per-minute token quotas: once one of them reaches zero,
+    requests wait for its reset. A 429 pauses all requests for its
+    retry-after, halves the allowed concurrency and retries with jittered
+    backoff; each success lets concurrency creep back up. Callers queue in
+    `acquire` instead of failing.
+    """
+    def __init__(self, requests_per_minute: float, audio_seconds_per_hour: float,
+                 max_concurrency: int = 8, max_retries: int = 5, min_billed_seconds: float = 10.0):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.audio = TokenBucket(audio_seconds_per_hour, audio_seconds_per_hour / 3600)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)
+        self.max_retries = max_retries
+        self.min_billed_seconds = min_billed_seconds  # Groq bills at least this much per request
+        self.in_flight = 0
+        self.started = 0  # requests ever started; orders responses against later requests
+        self.paused_until = 0.0
+        self.windows: Dict[str, Tuple[float, float]] = {}  # window -> (remaining, reset time)
+        # Created on the loop that uses the limiter (the batch CLI runs its own)
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+
+    def _cond(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    def _wait_time(self, cost: float, now: float) -> Optional[float]:
+        """Seconds until a request may start, or None if it waits for a free slot"""
+        wait = self.paused_until - now
+        for remaining, reset_at in self.windows.values():
+            if remaining <= 0:
+                wait = max(wait, reset_at - now)
+        if wait > 0:
+            return wait
+        if self.in_flight >= int(self.concurrency):
+            return None
+        return max(self.requests.wait_time(1, now), self.audio.wait_time(cost, now))
+
+    async def acquire(self, cost: float) -> int:
+        """Wait until a request of `cost` audio seconds may start; returns its ticket"""
+        condition = self._cond()
+        started = time.perf_counter()
+        clock = QUEUE_CLOCK.get()
+        if clock is not None:
+            clock.waiting_since = time.monotonic()
+        async with condition:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(cost, now)
+                if wait is not None and wait <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(condition.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+            self.requests.take(1)
+            self.audio.take(cost)
+            self.in_flight += 1
+            self.started += 1
+            ticket = self.started
+            daily = HEADER_WINDOWS["requests"]
+            if daily in self.windows:
+                remaining, reset_at = self.windows[daily]
+                self.windows[daily] = (remaining - 1, reset_at)
+        if clock is not None:
+            clock.waited = clock.queued(time.monotonic())
+            clock.waiting_since = None
+        METRICS.observe("rate_limit_wait", time.perf_counter() - started)
+        return ticket
+
+    async def release(self):
+        condition = self._cond()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def update(self, headers, ticket: Optional[int] = None):
+        """Take the server's view of the remaining quota from response headers.
+
+        The server counted the request with `ticket` but maybe none started
+        after it, so those are subtracted from the remaining requests.
+        """
+        if not headers:
+            return
+        now = time.monotonic()
+        sent_since = self.started - ticket if ticket is not None else 0
+        for name, value in headers.items():
+            name = name.lower()
+            if not name.startswith("x-ratelimit-remaining-"):
+                continue
+            kind = name[len("x-ratelimit-remaining-"):]
+            window = HEADER_WINDOWS.get(kind)
+            if window is None:
+                continue
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", "") or "")
+            try:
+                remaining = float(value)
+            except ValueError:
+                continue
+            if kind == "requests":
+                remaining -= sent_since
+            reset_at = now + (reset or 0.0)
+            previous = self.windows.get(window)
+            if previous and previous[1] > now and abs(previous[1] - reset_at) < 1.0:
+                # Same window: a late response must not undo newer counts
+                remaining = min(remaining, previous[0])
+            self.windows[window] = (remaining, reset_at)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps clients that failed together from retrying together
+        return random.uniform(0.0, min(30.0, 0.5 * 2 ** attempt))
+
+    async def run(self, request: Callable[[], Awaitable[T]], audio_seconds: float,
+                  retryable: Tuple[type, ...] = ()) -> T:
+        """Run `request` within the limits, retrying rate limits and transient errors.
+
+        `request` returns the raw response, whose headers update the limits.
+        """
+        cost = max(audio_seconds, self.min_billed_seconds)
+        attempt = 0
+        while True:
+            ticket = await self.acquire(cost)
+            try:
+                result = await request()
+                self.update(getattr(result, "headers", None), ticket)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                rate_limited = status == 429
+                if not (rate_limited or (status or 0) >= 500 or isinstance(e, retryable)):
+                    raise
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                if rate_limited:
+                    self._on_rate_limited(e, delay, cost, ticket)
+                    logger.warning(f"Rate limited, waiting {self.paused_until - time.monotonic():.1f}s "
+                                   f"(concurrency {int(self.concurrency)})")
+                else:
+                    logger.warning(f"Request failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            finally:
+                await self.release()
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            return result
+
+    def _on_rate_limited(self, error: Exception, delay: float, cost: float, ticket: int):
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        self.update(headers, ticket)
+        retry_after = parse_duration((headers or {}).get("retry-after", "") or "") or 0.0
+        self.paused_until = max(self.paused_until, time.monotonic() + max(retry_after, delay))
+        self.concurrency = max(1.0, self.concurrency / 2)
+        # The rejected request did not use any audio quota
+        self.audio.refund(cost)
+
+
+_LIMITERS: Dict[Tuple[str, str], RateLimiter] = {}
+
+
+def get_rate_limiter(config, base_url: str, api_key: str) -> RateLimiter:
+    """The limiter shared by every transcriber that uses the same account"""
+    key = (base_url, api_key)
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        limiter = _LIMITERS[key] = RateLimiter(
+            config.rate_limit_requests_per_minute,
+            config.rate_limit_audio_seconds_per_hour,
+            max_concurrency=config.rate_limit_max_concurrency,
+            max_retries=config.rate_limit_max_retries,
+        )
+    return limiter
@@ -0,0 +1,358 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from audio_codec import encode_audio
+from chunking import plan_chunks, splice, spliced_length, stitch_transcripts
+from config import Config
+from encoding_policy import EncodingPolicy
+from metrics import METRICS
+from ratelimit import QUEUE_CLOCK, QueueClock, get_rate_limiter
+from vad import VoiceActivityDetector
+from vocabulary import get_vocabulary
+
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MODEL_PREFIX = "local:"
+
+
+class TranscriptionError(Exception):
+    """Transcription failed; `partial_text` holds whatever did succeed"""
+    def __init__(self, message: str, partial_text: str = ""):
+        super().__init__(message)
+        self.partial_text = partial_text
+
+
+class Transcriber:
+    """Speech-to-text backend.
+
+    The shared flow trims silence and, for backends that benefit from it,
+    splits long recordings into chunks transcribed concurrently. Backends
+    implement `_transcribe_chunk`.
+    """
+    # Remote backends gain from parallel chunks and hedged duplicates;
+    # a local CPU model does not
+    supports_chunking = True
+    is_remote = True
+
+    def __init__(self, config: Config):
+        self.config = config
+
+    async def warm_up(self):
+        """Prepare for an upcoming request while the user is still speaking"""
+
+    async def close(self):
+        pass
+
+    def _trim(self, audio_data: np.ndarray, sample_rate: int) -> Optional[List[Tuple[int, int]]]:
+        """Sample ranges to transcribe; None if there is nothing to send"""
+        if not self.config.vad_enabled:
+            return [(0, len(audio_data))]
+        # Drop edge silence and long pauses; skip the request if nothing is left
+        vad = VoiceActivityDetector(sample_rate, self.config.vad_aggressiveness)
+        with METRICS.span("vad"):
+            keep = vad.keep_ranges(audio_data)
+        if keep is None:
+            logger.info("No speech detected, skipping transcription")
+            return None
+        logger.info(f"VAD kept {spliced_length(audio_data, keep)} of {len(audio_data)} samples")
+        return keep
+
+    async def transcribe(self, audio_data: np.ndarray, sample_rate: int = 16000) -> str:
+        try:
+            # CPU-bound work stays off the event loop. The recording may be a
+            # memory-mapped spool, so only the kept audio of one chunk at a
+            # time is copied
+            keep = await asyncio.to_thread(self._trim, audio_data, sample_rate)
+            if keep is None:
+                return ""
+            length = spliced_length(audio_data, keep)
+
+            if (not self.supports_chunking
+                    or length <= self.config.chunk_threshold_seconds * sample_rate):
+                audio = await asyncio.to_thread(splice, audio_data, keep, 0, length)
+                text = await self._request(audio, sample_rate)
+            else:
+                # Long recording: transcribe overlapping chunks concurrently
+                ranges = await asyncio.to_thread(
+                    plan_chunks, audio_data, sample_rate, self.config.chunk_seconds,
+                    self.config.chunk_overlap_seconds, keep=keep)
+                logger.info(f"Transcribing {len(ranges)} chunks concurrently")
+                semaphore = asyncio.Semaphore(self.config.max_chunk_concurrency)
+
+                async def transcribe_range(start, end):
+                    async with semaphore:
+                        return await self._request(splice(audio_data, keep, start, end), sample_rate)
+
+                texts = await asyncio.gather(*(transcribe_range(start, end) for start, end in ranges))
+                text = stitch_transcripts(texts)
+            # Loading the vocabulary the first time compiles it
+            return await asyncio.to_thread(self._apply_vocabulary, text)
+
+        except TranscriptionError:
+            raise
+        except Exception as e:
+            raise TranscriptionError(f"Transcription failed: {e}") from e
+
+    async def _request(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        """`_transcribe_chunk` with a deadline of Config.request_timeout"""
+        clock = QueueClock()
+        started = time.monotonic()
+
+        async def attempt():
+            # This task's own context, so the rate limiter reports to this clock
+            QUEUE_CLOCK.set(clock)
+            return await self._transcribe_chunk(audio_data, sample_rate)
+
+        task = asyncio.ensure_future(attempt())
+        try:
+            while True:
+                # Time spent queued behind the rate limiter does not count
+                now = time.monotonic()
+                remaining = self.config.request_timeout - (now - started - clock.queued(now))
+                if remaining <= 0:
+                    raise TranscriptionError(f"No answer within {self.config.request_timeout:.0f}s")
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+                if done:
+                    return task.result()
+        finally:
+            task.cancel()
+
+    def _apply_vocabulary(self, text: str) -> str:
+        # After stitching, so chunk overlaps are matched on the raw words
+        vocabulary = get_vocabulary(self.config)
+        if vocabulary is None:
+            return text
+        with METRICS.span("vocabulary"):
+            return vocabulary.apply(text)
+
+    async def _transcribe_chunk(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        raise NotImplementedError
+
+
+class GroqTranscriber(Transcriber):
+    """Groq, or any other OpenAI-compatible transcription endpoint"""
+    def __init__(self, config: Config, base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, model: Optional[str] = None):
+        super().__init__(config)
+        # Imported here: openai alone takes over half a second to import
+        import httpx
+        import openai
+
+        self.model = model or config.model
+        api_key = api_key or config.groq_api_key
+        base_url = base_url or config.api_base_url
+        # Keep-alive pool so requests reuse a warm TLS connection
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4,
+                                    keepalive_expiry=120),
+                timeout=httpx.Timeout(config.request_timeout, connect=10.0)
+            ),
+            # Retries go through the rate limiter instead
+            max_retries=0 if config.rate_limiter else 2
+        )
+        self.limiter = get_rate_limiter(config, base_url, api_key) if config.rate_limiter else None
+        self.retryable = (openai.APIConnectionError,)
+        # Learned per transcriber, since each backend has its own network path
+        self.policy = EncodingPolicy.from_config(config) if config.audio_format == "auto" else None
+
+    async def warm_up(self):
+        """Open a pooled connection while the user is still speaking"""
+        try:
+            await self.client.models.list()
+            logger.info("Transcription connection warmed up")
+        except Exception as e:
+            logger.debug(f"Warm-up request failed: {e}")
+
+    def _encode(self, audio_data: np.ndarray, sample_rate: int):
+        with METRICS.span("encode"):
+            if self.policy is not None:
+                return self.policy.encode(audio_data, sample_rate)
+            return encode_audio(audio_data, sample_rate, self.config.audio_format)
+
+    async def _transcribe_chunk(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        # Encode in memory, in the format that currently uploads fastest
+        upload = await asyncio.to_thread(self._encode, audio_data, sample_rate)
+        audio_seconds = len(audio_data) / sample_rate
+
+        async def request():
+            # The raw response carries the rate-limit headers
+            with METRICS.span("request"):
+                start = time.perf_counter()
+                raw = await self.client.audio.transcriptions.with_raw_response.create(
+                    model=self.model,
+                    file=upload,
+                    language=self.config.language,
+                    temperature=0  # Set to 0 for consistent results as recommended
+                )
+            if self.policy is not None:
+                self.policy.record_request(len(upload[1]), audio_seconds, time.perf_counter() - start)
+            return raw
+
+        # Transcribe with Groq, queueing behind the account's rate limits
+        if self.limiter is None:
+            raw = await request()
+        else:
+            raw = await self.limiter.run(request, audio_seconds, self.retryable)
+
+        return raw.parse().text.strip()
+
+    async def close(self):
+        await self.client.close()
+
+
+class LocalWhisperTranscriber(Transcriber):
+    """Offline CPU transcription with faster-whisper, kept resident in memory.
+
+    The model loads in the background as soon as the transcriber is created
+    and all inference runs on one dedicated thread, so requests never pay the
+    load cost and never compete with each other for cores.
+    """
+    supports_chunking = False
+    is_remote = False
+
+    def __init__(self, config: Config, model_name: str):
+        super().__init__(config)
+        self.model_name = model_name
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-whisper")
+        self._model_future = self.executor.submit(self._load_model)
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+
+        threads = self.config.local_threads or os.cpu_count() or 4
+        logger.info(f"Loading local model {self.model_name} "
+                    f"({self.config.local_compute_type}, {threads} threads)")
+        return WhisperModel(
+            self.model_name,
+            device="cpu",
+            compute_type=self.config.local_compute_type,
+            cpu_threads=threads
+        )
+
+    async def warm_up(self):
+        try:
+            await asyncio.wrap_future(self._model_future)
+        except ImportError:
+            logger.error("faster-whisper is not installed, local transcription unavailable")
+        except Exception as e:
+            logger.error(f"Failed to load local model {self.model_name}: {e}")
+
+    def _run_model(self, audio_data: np.ndarray) -> str:
+        model = self._model_future.result()
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+        segments, _ = model.transcribe(
+            audio_data.reshape(-1),
+            language=self.config.language,
+            beam_size=self.config.local_beam_size,
+            temperature=0,
+            condition_on_previous_text=False
+        )
+        return " ".join(segment.text.strip() for segment in segments)
+
+    async def _transcribe_chunk(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        if sample_rate != 16000:
+            raise ValueError(f"Local model expects 16 kHz audio, got {sample_rate} Hz")
+        loop = asyncio.get_running_loop()
+        clock = QUEUE_CLOCK.get()
+        if clock is not None:
+            clock.waiting_since = time.monotonic()
+
+        def run():
+            # Waiting for the model thread is queue time, like the rate limiter's
+            if clock is not None:
+                clock.waited = clock.queued(time.monotonic())
+                clock.waiting_since = None
+            return self._run_model(audio_data)
+
+        with METRICS.span("request"):
+            text = await loop.run_in_executor(self.executor, run)
+        return text.strip()
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class DeferredTranscriber(Transcriber):
+    """Stands in for a transcriber that is still being built.
+
+    `load()` runs the factory (typically on a background thread, since it
+    imports the API client); until then every call waits for it without
+    blocking the event loop.
+    """
+    def __init__(self, config: Config, factory: Callable[[], Transcriber]):
+        super().__init__(config)
+        self.factory = factory
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+    def load(self):
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.future.set_result(self.factory())
+        except Exception as e:
+            logger.error(f"Failed to create transcriber: {e}")
+            self.future.set_exception(e)
+
+    async def _target(self) -> Transcriber:
+        return await asyncio.wrap_future(self.future)
+
+    async def warm_up(self):
+        await (await self._target()).warm_up()
+
+    async def close(self):
+        if self.future.done() and self.future.exception() is None:
+            await self.future.result().close()
+
+    async def transcribe(self, audio_data: np.ndarray, sample_rate: int = 16000) -> str:
+        try:
+            target = await self._target()
+        except Exception as e:
+            raise TranscriptionError(f"Transcriber unavailable: {e}") from e
+        return await target.transcribe(audio_data, sample_rate)
+
+
+def create_backend(config: Config, spec: dict) -> Transcriber:
+    """Build one backend from a Config.backends entry"""
+    kind = spec.get("type", "openai")
+    if kind == "local":
+        return LocalWhisperTranscriber(config, spec["model"])
+    if kind in ("groq", "openai"):
+        return GroqTranscriber(config, base_url=spec.get("base_url"),
+                               api_key=spec.get("api_key"), model=spec.get("model"))
+    raise ValueError(f"Unknown transcription backend type '{kind}'")
+
+
+def create_transcriber(config: Config) -> Transcriber:
+    """Pick the backend from Config.model ("local:<name>" runs offline).
+
+    Extra entries in Config.backends, or hedging, wrap the backends in a
+    HedgedTranscriber that races them.
+    """
+    if config.model.startswith(LOCAL_MODEL_PREFIX):
+        primary = LocalWhisperTranscriber(config, config.model[len(LOCAL_MODEL_PREFIX):])
+    else:
+        primary = GroqTranscriber(config)
+
+    if not config.backends and not (config.hedge_requests and primary.is_remote):
+        return primary
+
+    from hedging import HedgedTranscriber
+
+    backends = [primary]
+    names = [config.model]
+    for spec in config.backends:
+        backends.append(create_backend(config, spec))
+        names.append(spec.get("name") or f"{spec.get('type', 'openai')}:{spec.get('model', config.model)}")
+    return HedgedTranscriber(config, backends, names)
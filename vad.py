@@ -0,0 +1,126 @@
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+# Per aggressiveness level (0-3): dB above the estimated noise floor needed to
+# enter speech, absolute dBFS floor, and the shortest run counted as speech.
+ENTER_MARGIN_DB = (6.0, 9.0, 12.0, 15.0)
+ABSOLUTE_FLOOR_DB = (-62.0, -56.0, -50.0, -45.0)
+MIN_SPEECH_MS = (30, 60, 90, 120)
+# Noise floor estimates above this are clipped so clips without pauses still pass
+MAX_NOISE_FLOOR_DB = -40.0
+# Frames analysed at a time, so long recordings are never copied whole
+BLOCK_FRAMES = 4096
+
+
+class VoiceActivityDetector:
+    """Frame energy + zero-crossing VAD with hysteresis, vectorized with NumPy"""
+    def __init__(self, sample_rate: int = 16000, aggressiveness: int = 2,
+                 frame_ms: int = 20, padding_ms: int = 200, max_pause_ms: int = 600):
+        level = min(max(int(aggressiveness), 0), 3)
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.enter_margin_db = ENTER_MARGIN_DB[level]
+        self.exit_margin_db = self.enter_margin_db * 0.6  # hysteresis
+        self.absolute_floor_db = ABSOLUTE_FLOOR_DB[level]
+        self.min_speech_frames = max(1, MIN_SPEECH_MS[level] // frame_ms)
+        self.padding_frames = padding_ms // frame_ms
+        self.max_pause_frames = max_pause_ms // frame_ms
+        # Fricatives are quiet but have a high zero-crossing rate
+        self.fricative_zcr = 0.25
+
+    def _frames(self, audio: np.ndarray) -> np.ndarray:
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        n_frames = -(-len(audio) // self.frame_length)
+        padded = np.zeros(n_frames * self.frame_length, dtype=np.float32)
+        padded[:len(audio)] = audio
+        return padded.reshape(n_frames, self.frame_length)
+
+    def frame_stats(self, audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Energy in dBFS and zero-crossing rate of each frame, a block at a time"""
+        if audio.ndim > 1:
+            audio = audio.reshape(len(audio), -1)[:, 0]
+        n_frames = -(-len(audio) // self.frame_length)
+        energy_db = np.empty(n_frames, dtype=np.float32)
+        zcr = np.empty(n_frames)
+        block = BLOCK_FRAMES * self.frame_length
+        for first in range(0, n_frames, BLOCK_FRAMES):
+            start = first * self.frame_length
+            frames = self._frames(audio[start:start + block])
+            rms = np.sqrt(np.mean(np.square(frames), axis=1))
+            energy_db[first:first + len(frames)] = 20 * np.log10(rms + 1e-10)
+            signs = np.signbit(frames)
+            zcr[first:first + len(frames)] = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return energy_db, zcr
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        """Return one boolean per frame, True where speech was detected"""
+        energy_db, zcr = self.frame_stats(audio)
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+
+        noise_floor_db = min(np.percentile(energy_db, 10), MAX_NOISE_FLOOR_DB)
+        enter_db = max(noise_floor_db + self.enter_margin_db, self.absolute_floor_db)
+        exit_db = max(noise_floor_db + self.exit_margin_db, self.absolute_floor_db - 6.0)
+        fricative_db = max(noise_floor_db + max(3.0, self.exit_margin_db / 2),
+                           self.absolute_floor_db - 9.0)
+
+        above_enter = energy_db >= enter_db
+        above_exit = above_enter | (energy_db >= exit_db) | (
+            (zcr >= self.fricative_zcr) & (energy_db >= fricative_db))
+
+        # Hysteresis: a run above the exit threshold is speech only if it
+        # reaches the enter threshold somewhere and lasts long enough.
+        starts = above_exit & ~np.concatenate(([False], above_exit[:-1]))
+        run_ids = np.cumsum(starts) * above_exit
+        n_runs = int(run_ids.max())
+        if n_runs == 0:
+            return np.zeros(len(energy_db), dtype=bool)
+        run_has_enter = np.bincount(run_ids, weights=above_enter, minlength=n_runs + 1) > 0
+        run_length = np.bincount(run_ids, minlength=n_runs + 1)
+        run_is_speech = run_has_enter & (run_length >= self.min_speech_frames)
+        run_is_speech[0] = False
+        return run_is_speech[run_ids]
+
+    def keep_mask(self, speech: np.ndarray) -> np.ndarray:
+        """Frames to keep: speech, padding at the edges and shortened pauses"""
+        n_frames = len(speech)
+        index = np.arange(n_frames)
+        last_speech = np.maximum.accumulate(np.where(speech, index, -1))
+        next_speech = np.minimum.accumulate(
+            np.where(speech, index, n_frames)[::-1])[::-1]
+        has_prev = last_speech >= 0
+        has_next = next_speech < n_frames
+        since_prev = index - last_speech
+        until_next = next_speech - index
+
+        half_pause = self.max_pause_frames // 2
+        internal = has_prev & has_next & (
+            (since_prev <= half_pause) | (until_next <= half_pause))
+        leading = ~has_prev & has_next & (until_next <= self.padding_frames)
+        trailing = has_prev & ~has_next & (since_prev <= self.padding_frames)
+        return speech | internal | leading | trailing
+
+    def keep_ranges(self, audio: np.ndarray) -> Optional[List[Tuple[int, int]]]:
+        """(start, end) sample ranges worth transcribing; None if there is no speech"""
+        speech = self.speech_mask(audio)
+        if not speech.any():
+            return None
+        keep = np.concatenate(([False], self.keep_mask(speech), [False]))
+        edges = np.flatnonzero(keep[1:] != keep[:-1]) * self.frame_length
+        return [(int(start), min(int(end), len(audio)))
+                for start, end in zip(edges[::2], edges[1::2])]
+
+    def trim(self, audio: np.ndarray) -> Optional[np.ndarray]:
+        """Trim edge silence and compress long pauses; None if there is no speech"""
+        ranges = self.keep_ranges(audio)
+        if ranges is None:
+            return None
+        if ranges == [(0, len(audio))]:
+            return audio
+        return np.concatenate([audio[start:end] for start, end in ranges])
@@ -0,0 +1,267 @@
+"""Custom vocabulary applied to every transcript before it is pasted
+
+The vocabulary file has one entry per line:
+
+    # Lines starting with # are comments
+    GitHub                       <- a term: fixes its spelling and case
+    cube control => kubectl      <- a correction
+    US => U.S.                   <- uppercase in the pattern: matches only that case
+
+Patterns match whole words only. All entries are compiled into a single
+Aho-Corasick automaton, so each transcript is scanned once however many
+entries there are. The compiled automaton is cached on disk and rebuilt
+only when the file changes.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+# Characters that end a sentence, and those that may stand between it and the next word
+SENTENCE_END = ".!?\n"
+SENTENCE_GAP = " \t\"'(\u201c\u2018"
+
+# (pattern, replacement, case sensitive)
+Entry = Tuple[str, str, bool]
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _starts_sentence(text: str, start: int) -> bool:
+    position = start - 1
+    while position >= 0 and text[position] in SENTENCE_GAP:
+        position -= 1
+    return position < 0 or text[position] in SENTENCE_END
+
+
+def _fold(text: str) -> str:
+    """Lowercase without changing the length, so offsets map back to the original"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. "İ") lowercase to two; keep those as they are
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def parse_entries(text: str) -> List[Entry]:
+    entries: Dict[Tuple[str, bool], Entry] = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=>" in line:
+            pattern, replacement = (part.strip() for part in line.split("=>", 1))
+            case_sensitive = pattern != pattern.lower()
+        else:
+            pattern = replacement = line
+            case_sensitive = False
+        pattern = " ".join(pattern.split())
+        if not pattern:
+            continue
+        # A later entry for the same pattern wins
+        entries[(pattern if case_sensitive else pattern.lower(), case_sensitive)] = (
+            pattern, replacement, case_sensitive)
+    return list(entries.values())
+
+
+class Vocabulary:
+    """Finds and replaces every entry in one pass over the text.
+
+    The automaton works on lowercased text. Each match is then checked for
+    word boundaries and, for case-sensitive entries, the exact spelling.
+    Overlapping matches resolve to the leftmost, then the longest.
+    """
+    def __init__(self, entries: List[Entry], tables=None):
+        self.entries = entries
+        # Per entry: length, and whether its first/last character needs a word boundary
+        self.shapes = [(len(pattern), _is_word_char(pattern[0]), _is_word_char(pattern[-1]))
+                       for pattern, _, _ in entries]
+        if tables is None:
+            tables = self._build()
+        self.goto, self.fail, self.outputs = tables
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[list] = [[]]
+        for index, (pattern, _, _) in enumerate(self.entries):
+            state = 0
+            for char in _fold(pattern):
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+
+        # Breadth-first, so every fail target is complete before it is used
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[child] = goto[target].get(char, 0)
+                outputs[child].extend(outputs[fail[child]])
+        # Case-sensitive entries first: they are the more specific match
+        return goto, fail, [tuple(sorted(out, key=lambda i: not self.entries[i][2])) for out in outputs]
+
+    def apply(self, text: str) -> str:
+        if not text or not self.entries:
+            return text
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        matches = []
+        state = 0
+        for end, char in enumerate(_fold(text), 1):
+            while True:
+                next_state = goto[state].get(char)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if outputs[state]:
+                matches.extend(self._accepted(text, end, outputs[state]))
+        if not matches:
+            return text
+
+        pieces = []
+        position = 0
+        for start, end, index in sorted(matches, key=lambda match: (match[0], -match[1])):
+            if start < position:
+                continue  # overlaps a match already taken
+            pieces.append(text[position:start])
+            pieces.append(self._replacement(text, start, index))
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+    def _accepted(self, text: str, end: int, candidates):
+        taken = set()  # per span, only the first (most specific) entry
+        for index in candidates:
+            length, left, right = self.shapes[index]
+            start = end - length
+            if length in taken:
+                continue
+            if left and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if right and end < len(text) and _is_word_char(text[end]):
+                continue
+            pattern, _, case_sensitive = self.entries[index]
+            if case_sensitive and text[start:end] != pattern:
+                continue
+            taken.add(length)
+            yield start, end, index
+
+    def _replacement(self, text: str, start: int, index: int) -> str:
+        _, replacement, case_sensitive = self.entries[index]
+        # Keep a capital at the start of a sentence: "Gonna" -> "Going to",
+        # but not elsewhere: "use Cube Control" -> "use kubectl"
+        if (not case_sensitive and replacement[:1].islower() and text[start].isupper()
+                and _starts_sentence(text, start)):
+            return replacement[0].upper() + replacement[1:]
+        return replacement
+
+    @classmethod
+    def from_file(cls, path: Path, cache_dir: Optional[Path] = None) -> "Vocabulary":
+        """Load the compiled automaton from the cache, or build and cache it"""
+        stat = path.stat()
+        key = (CACHE_VERSION, str(path), stat.st_mtime_ns, stat.st_size)
+        cache_path = None
+        if cache_dir is not None:
+            name = hashlib.sha1(str(path).encode('utf-8')).hexdigest()[:16]
+            cache_path = cache_dir / f"vocabulary-{name}.pickle"
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached["key"] == key:
+                    return cls(cached["entries"], cached["tables"])
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable vocabulary cache {cache_path}: {e}")
+
+        vocabulary = cls(parse_entries(path.read_text(encoding='utf-8')))
+        logger.info(f"Compiled {len(vocabulary)} vocabulary entries from {path}")
+        if cache_path is not None:
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                temporary = cache_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(temporary, 'wb') as f:
+                    pickle.dump({"key": key, "entries": vocabulary.entries,
+                                 "tables": (vocabulary.goto, vocabulary.fail, vocabulary.outputs)},
+                                f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary, cache_path)
+            except OSError as e:
+                logger.warning(f"Cannot cache the compiled vocabulary: {e}")
+        return vocabulary
+
+
+_loaded: Dict[Path, Tuple[tuple, Vocabulary]] = {}
+_rebuilding = set()
+_lock = threading.Lock()
+
+
+def _load(path: Path, cache_dir: Path) -> Optional[Vocabulary]:
+    try:
+        return Vocabulary.from_file(path, cache_dir)
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Cannot load vocabulary {path}: {e}")
+        return None
+
+
+def _rebuild(path: Path, stamp: tuple, cache_dir: Path):
+    vocabulary = _load(path, cache_dir)
+    with _lock:
+        _rebuilding.discard(path)
+        # On failure keep the old entries, and don't retry until the file changes again
+        _loaded[path] = (stamp, vocabulary or _loaded[path][1])
+
+
+def get_vocabulary(config) -> Optional[Vocabulary]:
+    """The vocabulary named by Config.vocabulary_file, reloaded if the file changed.
+
+    Costs one stat() per call once loaded. Only the first load compiles in
+    the caller; after an edit the previous version is used until the new one
+    has compiled in the background, so edits apply without a restart or a
+    stalled transcript.
+    """
+    if not config.vocabulary_file:
+        return None
+    path = Path(config.vocabulary_file).expanduser().resolve()
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cache_dir = Path(config.cache_dir).expanduser()
+    with _lock:
+        loaded = _loaded.get(path)
+        if loaded is not None:
+            if loaded[0] != stamp and path not in _rebuilding:
+                _rebuilding.add(path)
+                threading.Thread(target=_rebuild, args=(path, stamp, cache_dir),
+                                 name="vocabulary", daemon=True).start()
+            return loaded[1]
+        vocabulary = _load(path, cache_dir)
+        if vocabulary is not None:
+            _loaded[path] = (stamp, vocabulary)
+        return vocabulary